@@ -1,5 +1,3 @@
-print("DEBUG: mambu_api_scraper.py - Script Start") # DEBUG Line
-
 #!/usr/bin/env python3
 """
 Mambu API Documentation Scraper
@@ -12,27 +10,54 @@ sections and code examples.
 import os
 import logging
 import argparse
+import asyncio
 from datetime import datetime
 import website_scraper
-import sys
-import time
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
 
 # Constants specific to Mambu API docs
 MAMBU_API_URL = "https://api.mambu.com"
 DEFAULT_OUTPUT_DIR = "./mambu_api_output"
 
+# Documentation URL per known API version
+_API_URLS = {api_version: f"{MAMBU_API_URL}/#/{api_version}" for api_version in ("v1", "v2", "payments", "streaming")}
+
 # This will hold the parsed arguments, to be accessible by enhance_for_mambu_api
 # We are making it global here to simplify, but in a larger app, passing it around would be cleaner.
 parsed_args_global = None
 
+# Returns the text of the first rendered code sample; used to detect when a language tab click took effect
+CODE_SAMPLE_TEXT_SCRIPT = "const el = document.querySelector('pre.highlight'); return el ? el.textContent : null;"
+
+# XPath locators for the code language tabs, keyed by the --language choice.
+# Each matches either the tab link or its plain-text span label.
+def _language_tab_locator(label, href_condition=None):
+    href_condition = href_condition or f"contains(@href,'{label}')"
+    return (By.XPATH, f"//a[{href_condition}] | //li/span[normalize-space(text())='{label}']")
+
+LANGUAGE_SELECTORS = {
+    "curl": _language_tab_locator("cURL"),
+    "http": _language_tab_locator("HTTP"),
+    "javascript": _language_tab_locator("JavaScript"),
+    "ruby": _language_tab_locator("Ruby"),
+    "python": _language_tab_locator("Python"),
+    "java": _language_tab_locator("Java", "contains(@href,'Java') and not(contains(@href,'JavaScript'))"),
+    "go": _language_tab_locator("Go"),
+    "php": _language_tab_locator("PHP")
+}
+
 def parse_arguments():
     """Parse command line arguments specific to Mambu API scraping."""
     parser = argparse.ArgumentParser(description="Scrape Mambu API documentation.")
     
     # Scraping parameters
-    parser.add_argument("--api_version", default=os.environ.get('API_VERSION', "v2"), 
+    parser.add_argument("--api_version", nargs='+', default=os.environ.get('API_VERSION', "v2").split(), 
                         choices=["v1", "v2", "payments", "streaming"], 
-                        help="Mambu API version to scrape")
+                        help="Mambu API version(s) to scrape; several versions are scraped concurrently")
+    parser.add_argument("--max_concurrency", type=int, default=int(os.environ.get('MAX_CONCURRENCY', 4)),
+                        help="Maximum number of API versions scraped at the same time (one browser each)")
     parser.add_argument("--output_dir", default=os.environ.get('OUTPUT_DIR', DEFAULT_OUTPUT_DIR), 
                         help="Directory to save scraped data")
     parser.add_argument("--log_level", default=os.environ.get('LOG_LEVEL', "INFO"), 
@@ -54,17 +79,29 @@ def parse_arguments():
 
 def get_api_url(api_version):
     """Get the appropriate URL for the specified API version."""
-    if api_version == "v2":
-        return f"{MAMBU_API_URL}/#/v2"
-    elif api_version == "v1":
-        return f"{MAMBU_API_URL}/#/v1"
-    elif api_version == "payments":
-        return f"{MAMBU_API_URL}/#/payments"
-    elif api_version == "streaming":
-        return f"{MAMBU_API_URL}/#/streaming"
-    else:
-        # Fallback for any other value, assuming it's a direct path segment
-        return f"{MAMBU_API_URL}/#/{api_version}"
+    # Fallback for any other value, assuming it's a direct path segment
+    return _API_URLS.get(api_version) or f"{MAMBU_API_URL}/#/{api_version}"
+
+def find_language_tab(driver, locator):
+    """Return the first displayed and enabled language tab matching the locator, or None."""
+    for tab in driver.find_elements(*locator):
+        if tab.is_displayed() and tab.is_enabled():
+            return tab
+    return None
+
+def click_language_tab(driver, tab, language):
+    """Click a language tab and wait for the code samples to switch."""
+    logging.info(f"Attempting to click language tab: {tab.text}")
+    old_code_sample = driver.execute_script(CODE_SAMPLE_TEXT_SCRIPT)
+    driver.execute_script("arguments[0].click();", tab)
+    try:
+        # Wait for the code samples to actually switch instead of sleeping blindly
+        WebDriverWait(driver, 2).until(
+            lambda d: d.execute_script(CODE_SAMPLE_TEXT_SCRIPT) != old_code_sample
+        )
+    except TimeoutException:
+        logging.warning(f"Code samples did not change after clicking the {language} tab (it may already be selected).")
+    logging.info(f"Selected {language} language tab.")
 
 def enhance_for_mambu_api(driver, language_arg_from_main):
     """Apply Mambu API-specific enhancements to the extraction process."""
@@ -74,32 +111,14 @@ def enhance_for_mambu_api(driver, language_arg_from_main):
         effective_language_arg = language_arg_from_main.lower()
         if effective_language_arg != "all":
             logging.info(f"Setting preferred code language to: {effective_language_arg}")
-            language_selectors = {
-                "curl": "a[href*='cURL'], li > span:contains('cURL')", # Adjusted selectors
-                "http": "a[href*='HTTP'], li > span:contains('HTTP')",
-                "javascript": "a[href*='JavaScript'], li > span:contains('JavaScript')",
-                "ruby": "a[href*='Ruby'], li > span:contains('Ruby')",
-                "python": "a[href*='Python'], li > span:contains('Python')",
-                "java": "a[href*='Java']:not([href*='JavaScript']), li > span:contains('Java'):not(:contains('JavaScript'))",
-                "go": "a[href*='Go'], li > span:contains('Go')",
-                "php": "a[href*='PHP'], li > span:contains('PHP')"
-            }
-            
-            if effective_language_arg in language_selectors:
-                selector_query = language_selectors[effective_language_arg]
+            if effective_language_arg in LANGUAGE_SELECTORS:
+                tab_locator = LANGUAGE_SELECTORS[effective_language_arg]
                 try:
-                    tabs = driver.find_elements(website_scraper.By.CSS_SELECTOR, selector_query)
-                    clicked = False
-                    for tab in tabs:
-                        if tab.is_displayed() and tab.is_enabled():
-                            logging.info(f"Attempting to click language tab: {tab.text}")
-                            driver.execute_script("arguments[0].click();", tab)
-                            time.sleep(0.5) # Give it a moment to react
-                            logging.info(f"Selected {effective_language_arg} language tab.")
-                            clicked = True
-                            break
-                    if not clicked:
-                        logging.warning(f"Language tab for '{effective_language_arg}' not found or not clickable with selector '{selector_query}'.")
+                    tab = find_language_tab(driver, tab_locator)
+                    if tab is None:
+                        logging.warning(f"Language tab for '{effective_language_arg}' not found or not clickable with locator '{tab_locator[1]}'.")
+                    else:
+                        click_language_tab(driver, tab, effective_language_arg)
                 except Exception as e:
                     logging.warning(f"Could not set language preference to {effective_language_arg}: {e}")
             else:
@@ -107,24 +126,35 @@ def enhance_for_mambu_api(driver, language_arg_from_main):
     except Exception as e:
         logging.error(f"Error in Mambu API-specific enhancements: {e}")
 
-def main():
-    """Main function to run the Mambu API scraper."""
-    global parsed_args_global # To make args accessible to the hook function via a global
-    parsed_args_global = parse_arguments()
-    
-    website_scraper.setup_logging(parsed_args_global.log_level)
-    logging.info(f"Starting Mambu API documentation scraper for {parsed_args_global.api_version}")
-    print(f"DEBUG: mambu_api_scraper.py - Log level set to: {parsed_args_global.log_level}") # DEBUG
+def select_code_language(driver):
+    """Called by website_scraper once the page is loaded, before any section is read."""
+    enhance_for_mambu_api(driver, parsed_args_global.language)
 
-    os.makedirs(parsed_args_global.output_dir, exist_ok=True)
-    
-    api_url = get_api_url(parsed_args_global.api_version)
+def mambu_enhanced_extract_page_content(driver, url):
+    """Extraction hook passed to website_scraper: select the code language once the page has loaded, then yield sections as usual."""
+    logging.debug("Entering mambu_enhanced_extract_page_content")
+    # This assumes website_scraper.extract_page_content is designed for single-page apps
+    # or can be adapted via its internal logic (e.g. by identifying sections)
+    logging.debug("Calling website_scraper.extract_page_content")
+    yield from website_scraper.extract_page_content(driver, url, after_load=select_code_language)
+
+def scrape_api_version(api_version):
+    """Scrape a single API version with its own browser and return the final Markdown path."""
+    logging.info(f"Starting Mambu API documentation scraper for {api_version}")
+
+    api_url = get_api_url(api_version)
     logging.info(f"Scraping Mambu API documentation from: {api_url}")
-    print(f"DEBUG: mambu_api_scraper.py - Target URL: {api_url}") # DEBUG
+    logging.debug(f"Target URL: {api_url}")
+
+    # The filename includes the API version, so concurrent runs never collide
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_filename = f"mambu_api_{api_version}_docs_{parsed_args_global.language}_{timestamp}.md"
 
     scraper_args_for_website_scraper = argparse.Namespace(
         start_url=api_url,
         output_dir=parsed_args_global.output_dir,
+        output_filename=output_filename,
+        archive_filename_prefix=f"mambu_api_{api_version}_docs_",
         log_level=parsed_args_global.log_level,
         target_folder_id=parsed_args_global.target_folder_id,
         archive_folder_id=parsed_args_global.archive_folder_id,
@@ -133,69 +163,57 @@ def main():
         upload_only_file=None, # Not used in this specialized script's main flow
         config_file=None,
         max_pages=1, # Effectively, as it's a single page structure
-        delay_between_pages=parsed_args_global.delay_between_pages if hasattr(parsed_args_global, 'delay_between_pages') else 1.0
+        delay_between_pages=parsed_args_global.delay_between_pages if hasattr(parsed_args_global, 'delay_between_pages') else 1.0,
+        extract_hook=mambu_enhanced_extract_page_content, # Injected instead of monkey-patching website_scraper
+        configure_logging=False # Configured once in main(); versions run concurrently in threads
     )
 
-    # Monkey-patch or hook into website_scraper's content extraction if needed,
-    # or ensure website_scraper's extract_page_content is suitable.
-    # For Mambu API, we might need a specific extraction logic for its unique structure.
+    output_file = None
+    try:
+        logging.debug(f"Calling website_scraper.main() for {api_version}")
+        output_file = website_scraper.main(scraper_args_for_website_scraper)
+        logging.debug(f"website_scraper.main() returned: {output_file}")
+        
+    except Exception as e:
+        logging.critical(f"Error running Mambu API scraper's main logic for {api_version}: {e}", exc_info=True)
+
+    return output_file
+
+async def scrape_api_versions(api_versions, max_concurrency):
+    """Scrape all requested API versions concurrently, bounded by max_concurrency browsers."""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
 
-    original_extract_page_content = website_scraper.extract_page_content
+    async def scrape_one(api_version):
+        async with semaphore:
+            # Selenium is blocking, so each version runs its own driver in a worker thread
+            return await asyncio.to_thread(scrape_api_version, api_version)
 
-    def mambu_enhanced_extract_page_content(driver, url):
-        print("DEBUG: mambu_api_scraper.py - Entering mambu_enhanced_extract_page_content") # DEBUG
-        enhance_for_mambu_api(driver, parsed_args_global.language)
-        # Now, call the original (or a more specialized one if website_scraper.py has it)
-        # This assumes website_scraper.extract_page_content is designed for single-page apps
-        # or can be adapted via its internal logic (e.g. by identifying sections)
-        print("DEBUG: mambu_api_scraper.py - Calling original_extract_page_content") # DEBUG
-        result = original_extract_page_content(driver, url)
-        print(f"DEBUG: mambu_api_scraper.py - Exiting mambu_enhanced_extract_page_content, result sections: {len(result) if isinstance(result, list) else 'N/A'}") # DEBUG
-        return result
+    return await asyncio.gather(*(scrape_one(api_version) for api_version in api_versions))
 
-    website_scraper.extract_page_content = mambu_enhanced_extract_page_content
+def main():
+    """Main function to run the Mambu API scraper."""
+    global parsed_args_global # To make args accessible to the hook function via a global
+    parsed_args_global = parse_arguments()
     
-    output_file = None
+    website_scraper.setup_logging(parsed_args_global.log_level)
+    api_versions = list(dict.fromkeys(parsed_args_global.api_version)) # Drop duplicates, keep order
+    logging.info(f"Starting Mambu API documentation scraper for {', '.join(api_versions)}")
+    logging.debug(f"Log level set to: {parsed_args_global.log_level}")
+
+    os.makedirs(parsed_args_global.output_dir, exist_ok=True)
+
+    output_files = []
     try:
-        print("DEBUG: mambu_api_scraper.py - Calling website_scraper.main()") # DEBUG
-        output_file = website_scraper.main(scraper_args_for_website_scraper)
-        print(f"DEBUG: mambu_api_scraper.py - website_scraper.main() returned: {output_file}") # DEBUG
-        
-        if output_file and os.path.exists(output_file):
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            new_filename_base = f"mambu_api_{parsed_args_global.api_version}_docs_{parsed_args_global.language}_{timestamp}.md"
-            new_filename = os.path.join(parsed_args_global.output_dir, new_filename_base)
-            try:
-                os.rename(output_file, new_filename)
-                logging.info(f"Renamed output file to: {new_filename}")
-                output_file = new_filename # update path to new name
-            except Exception as e:
-                logging.error(f"Error renaming output file '{output_file}' to '{new_filename}': {e}")
-        
+        results = asyncio.run(scrape_api_versions(api_versions, parsed_args_global.max_concurrency))
+        output_files = [output_file for output_file in results if output_file]
     except Exception as e:
         logging.critical(f"Error running Mambu API scraper's main logic: {e}", exc_info=True)
-        print(f"DEBUG: mambu_api_scraper.py - Exception in main logic: {e}") # DEBUG
-    finally:
-        website_scraper.extract_page_content = original_extract_page_content # Restore
-        print("DEBUG: mambu_api_scraper.py - Restored original_extract_page_content") # DEBUG
 
-    return output_file
+    return output_files
 
 if __name__ == "__main__":
-    print("DEBUG: mambu_api_scraper.py - Inside __main__ block") # DEBUG Line
-    # Need to ensure website_scraper also has its By imported if used by enhance_for_mambu_api directly
-    # For simplicity, ensure website_scraper exposes By or handle imports carefully.
-    # A quick check for `time` module for `time.sleep` if used in enhance_for_mambu_api:
-    if 'time' not in sys.modules:
-        import time 
-
-    final_output_path = main()
-    if final_output_path:
-        logging.info(f"Mambu API documentation scraping completed. Output: {final_output_path}")
-        print(f"DEBUG: mambu_api_scraper.py - Success, output: {final_output_path}") # DEBUG Line
+    final_output_paths = main()
+    if final_output_paths:
+        logging.info(f"Mambu API documentation scraping completed. Output: {', '.join(final_output_paths)}")
     else:
         logging.error("Mambu API documentation scraping failed or produced no output file.")
-        print("DEBUG: mambu_api_scraper.py - Failed or no output file") # DEBUG Line
-
-# Ensure all necessary imports are at the top, like `import sys` if using `sys.modules`.
-# It might be better to add `import time` and `import sys` at the top of the file. 
\ No newline at end of file
@@ -5,35 +5,63 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+try:
+    # Optional C-backed parser for pages fetched over HTTP; BeautifulSoup/lxml is used without it
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from tenacity import retry, retry_if_result, stop_after_attempt, wait_exponential
 import time
 import logging
-import json
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import atexit
+import hashlib
+import subprocess
+import orjson
+try:
+    # Optional: xxh3 hashes page text and shingles many times faster than blake2b
+    import xxhash
+except ImportError:
+    xxhash = None
+import zstandard
 from datetime import datetime
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 import re
 import os
+import platform
 import urllib.request
 import zipfile
+import tempfile
 import io
 import ssl
 import certifi
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 import html2text
-from collections import deque
 import argparse
+import shutil
+import concurrent.futures
+import threading
+from itertools import islice
 
 # --- Add Logging Setup Function --- 
 def setup_logging(log_level="INFO"):
     """Sets up basic logging configuration."""
     level = getattr(logging, log_level.upper(), logging.INFO)
+    # Scraper threads only enqueue records; a background listener does the file and console I/O
+    log_queue = queue.Queue(-1)
     logging.basicConfig(level=level,
                         format='%(asctime)s - %(levelname)s - %(message)s',
-                        handlers=[
-                            logging.FileHandler("scraper.log", mode='w'), # Log to file
-                            logging.StreamHandler()  # Also log to console
-                        ])
+                        handlers=[QueueHandler(log_queue)])
+    listener = QueueListener(log_queue,
+                             logging.FileHandler("scraper.log", mode='w'), # Log to file
+                             logging.StreamHandler())  # Also log to console
+    listener.start()
+    atexit.register(listener.stop) # Flush whatever is still queued on shutdown
     # Suppress verbose logging from selenium and urlib3
     logging.getLogger("selenium").setLevel(logging.WARNING)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -41,81 +69,218 @@ def setup_logging(log_level="INFO"):
     logging.info(f"Logging configured at level: {log_level}")
 # --- End Logging Setup Function --- 
 
+# Requests the browser never needs to make for text extraction
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*/analytics/*",
+]
+
+# Run Chrome with a visible window instead of headless (debugging aid)
+HEADED = os.environ.get("SCRAPER_HEADED", "") not in ("", "0")
+
 def setup_driver():
     """Initialize and return a Chrome driver for scraping."""
     chrome_options = Options()
     chrome_options.add_argument("--window-size=1920,1080")
-    # Don't use headless mode so we can see what's happening
-    # chrome_options.add_argument("--headless=new")
+    # Headless by default; set SCRAPER_HEADED=1 to watch the browser while debugging
+    if not HEADED:
+        chrome_options.add_argument("--headless=new")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
+    # Subsystems a scraper never uses
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-background-networking")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+    chrome_options.add_argument("--disable-features=TranslateUI")
+    # Embedded videos would otherwise start buffering as soon as the DOM is ready
+    chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+    chrome_options.add_argument("--mute-audio")
+    # Text scraping never needs images, pop-ups, or permission prompts. Stylesheets stay on:
+    # innerText and the overlay probe depend on computed layout
+    prefs = {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.popups": 2,
+        "profile.managed_default_content_settings.geolocation": 2,
+        "profile.managed_default_content_settings.media_stream": 2,
+        "profile.default_content_setting_values.notifications": 2
+    }
+    chrome_options.add_experimental_option("prefs", prefs)
+    # Return from driver.get() at DOMContentLoaded; callers wait for the elements they need
+    chrome_options.page_load_strategy = "eager"
     
     try:
         chromedriver_path = get_chromedriver_path()
         service = Service(executable_path=chromedriver_path)
         driver = webdriver.Chrome(service=service, options=chrome_options)
         logging.info(f"Using cached ChromeDriver from: {chromedriver_path}")
+        block_unneeded_resources(driver)
         return driver
     except Exception as e:
         logging.error(f"Error setting up ChromeDriver: {str(e)}")
         raise
 
+def block_unneeded_resources(driver):
+    """Stop Chrome from downloading images, fonts, media and analytics, which never reach the extracted text."""
+    # Stylesheets stay enabled: innerText and the overlay probe's visibility check need real layout
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCE_PATTERNS})
+        logging.debug("Blocking image, font, media and analytics requests in the browser.")
+    except Exception as e:
+        logging.warning(f"Could not block resource loading via CDP: {e}")
+
+# Compiled once at import; clean_text is called for every extracted block
+_WS_RE = re.compile(r'\s+')
+
 def clean_text(text):
     """Clean and normalize text."""
     if not text:
         return ""
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     return text.strip()
 
+# --- ChromeDriver cache ---
+# Drivers are kept per platform and Chrome major version under the XDG cache dir so they survive
+# fresh checkouts; a sha256 manifest next to each binary catches truncated or corrupted files
+CHROMEDRIVER_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'mambu-scraper', 'chromedriver')
+
+def detect_chromedriver_platform():
+    """Return the Chrome for Testing platform name (linux64, mac-arm64, mac-x64 or win64) of this machine."""
+    system = platform.system()
+    if system == 'Darwin':
+        return 'mac-arm64' if platform.machine().lower() in ('arm64', 'aarch64') else 'mac-x64'
+    if system == 'Windows':
+        return 'win64'
+    return 'linux64'
+
+CHROMEDRIVER_PLATFORM = detect_chromedriver_platform()
+CHROMEDRIVER_BINARY = 'chromedriver.exe' if CHROMEDRIVER_PLATFORM == 'win64' else 'chromedriver'
+# Used when the installed Chrome cannot be detected or looked up
+CHROMEDRIVER_FALLBACK_VERSION = '134.0.6998.165'
+CHROME_BINARIES = ['/Applications/Google Chrome.app/Contents/MacOS/Google Chrome', 'google-chrome', 'chromium']
+CHROME_MILESTONES_URL = 'https://googlechromelabs.github.io/chrome-for-testing/latest-versions-per-milestone-with-downloads.json'
+
+def file_sha256(path):
+    """Return the hex sha256 of a file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def detect_chrome_major_version():
+    """Return the installed Chrome's major version as a string, or None if no binary answers."""
+    for binary in CHROME_BINARIES:
+        try:
+            output = subprocess.run([binary, '--version'], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r'(\d+)\.\d+\.\d+\.\d+', output)
+        if match:
+            return match.group(1)
+    return None
+
+def resolve_chromedriver_download(major, context):
+    """Return (version, url) of the ChromeDriver build matching a Chrome major version."""
+    fallback = (CHROMEDRIVER_FALLBACK_VERSION,
+                f'https://storage.googleapis.com/chrome-for-testing-public/{CHROMEDRIVER_FALLBACK_VERSION}/{CHROMEDRIVER_PLATFORM}/chromedriver-{CHROMEDRIVER_PLATFORM}.zip')
+    if not major:
+        return fallback
+    try:
+        with urllib.request.urlopen(CHROME_MILESTONES_URL, context=context, timeout=30) as response:
+            milestone = orjson.loads(response.read())['milestones'][major]
+        for download in milestone['downloads']['chromedriver']:
+            if download['platform'] == CHROMEDRIVER_PLATFORM:
+                return milestone['version'], download['url']
+        logging.warning(f"No {CHROMEDRIVER_PLATFORM} ChromeDriver listed for Chrome {major}; using {CHROMEDRIVER_FALLBACK_VERSION}.")
+    except Exception as e:
+        logging.warning(f"Could not look up ChromeDriver for Chrome {major}: {e}; using {CHROMEDRIVER_FALLBACK_VERSION}.")
+    return fallback
+
+# Browser pool workers start their drivers at the same moment; only one at a time may check
+# or download the cached binary, or they would write the same files concurrently
+_chromedriver_lock = threading.Lock()
+# Path verified by the first lookup; later drivers (pool workers, restarts) reuse it without
+# re-running `chrome --version` and re-hashing the binary
+_verified_chromedriver_path = None
+
 def get_chromedriver_path():
-    """Get the path to the ChromeDriver executable."""
-    import urllib.request
-    import zipfile
-    import io
+    """Get the path to the ChromeDriver executable, downloading it into the cache if needed."""
+    global _verified_chromedriver_path
+    with _chromedriver_lock:
+        if _verified_chromedriver_path is None:
+            _verified_chromedriver_path = _resolve_chromedriver_path()
+        return _verified_chromedriver_path
+
+def _resolve_chromedriver_path():
+    major = detect_chrome_major_version()
+    version_dir = os.path.join(CHROMEDRIVER_CACHE_DIR, CHROMEDRIVER_PLATFORM, major or CHROMEDRIVER_FALLBACK_VERSION)
+    chromedriver_path = os.path.join(version_dir, CHROMEDRIVER_BINARY)
+    manifest_path = os.path.join(version_dir, 'manifest.json')
+    os.makedirs(version_dir, exist_ok=True)
     
-    chromedriver_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chromedriver_bin')
-    chromedriver_path = os.path.join(chromedriver_dir, 'chromedriver')
-    os.makedirs(chromedriver_dir, exist_ok=True)
+    try:
+        with open(manifest_path, 'rb') as f:
+            manifest = orjson.loads(f.read())
+        cached = os.path.exists(chromedriver_path) and file_sha256(chromedriver_path) == manifest.get('sha256')
+    except (OSError, orjson.JSONDecodeError):
+        cached = False
     
-    if not os.path.exists(chromedriver_path):
-        logging.info("ChromeDriver not found locally. Downloading...")
-        # Match ChromeDriver version to installed Chrome version (134.0.6998.166 -> using 134.0.6998.165)
-        chromedriver_url = 'https://storage.googleapis.com/chrome-for-testing-public/134.0.6998.165/mac-arm64/chromedriver-mac-arm64.zip'
+    if not cached:
+        logging.info(f"No verified ChromeDriver cached for Chrome {major or 'unknown'}. Downloading...")
+        context = ssl.create_default_context(cafile=certifi.where())
+        version, chromedriver_url = resolve_chromedriver_download(major, context)
         
         try:
-            # Download the zip file
-            context = ssl.create_default_context(cafile=certifi.where())
-            response = urllib.request.urlopen(chromedriver_url, context=context)
-            zip_data = io.BytesIO(response.read())
-            
-            # Extract the correct binary
-            with zipfile.ZipFile(zip_data) as zip_file:
-                # Find the correct binary path within the zip (it might be nested)
-                binary_path_in_zip = None
-                for name in zip_file.namelist():
-                    # Look for the specific binary path, e.g., 'chromedriver-mac-arm64/chromedriver'
-                    if name.endswith('/chromedriver') and not name.startswith('__MACOSX'):
-                        binary_path_in_zip = name
-                        break
+            # Stream the zip to an anonymous temp file in 64 KiB chunks instead of reading it into memory
+            with urllib.request.urlopen(chromedriver_url, context=context) as response, tempfile.TemporaryFile() as zip_data:
+                shutil.copyfileobj(response, zip_data, 64 * 1024)
+                zip_data.seek(0)
                 
-                if binary_path_in_zip:
-                    logging.info(f"Extracting {binary_path_in_zip} to {chromedriver_path}")
-                    with zip_file.open(binary_path_in_zip) as source, open(chromedriver_path, 'wb') as target:
-                        target.write(source.read())
-                    # Make ChromeDriver executable
-                    os.chmod(chromedriver_path, 0o755)
-                    logging.info("ChromeDriver downloaded and extracted successfully.")
-                else:
-                    raise Exception("Could not find chromedriver binary in the downloaded zip file.")
+                # Extract the correct binary
+                with zipfile.ZipFile(zip_data) as zip_file:
+                    # Find the correct binary path within the zip (it might be nested)
+                    binary_path_in_zip = None
+                    for name in zip_file.namelist():
+                        # Look for the specific binary path, e.g., 'chromedriver-linux64/chromedriver'
+                        if name.endswith('/' + CHROMEDRIVER_BINARY) and not name.startswith('__MACOSX'):
+                            binary_path_in_zip = name
+                            break
+                    
+                    if binary_path_in_zip:
+                        logging.info(f"Extracting {binary_path_in_zip} ({version}) to {chromedriver_path}")
+                        # Extract next to the target and swap it in, so an interrupted download
+                        # never leaves a truncated executable in the cache
+                        tmp_path = chromedriver_path + '.tmp'
+                        with zip_file.open(binary_path_in_zip) as source, open(tmp_path, 'wb') as target:
+                            shutil.copyfileobj(source, target, 64 * 1024)
+                        # Make ChromeDriver executable
+                        os.chmod(tmp_path, 0o755)
+                        sha256 = file_sha256(tmp_path)
+                        os.replace(tmp_path, chromedriver_path)
+                        logging.info("ChromeDriver downloaded and extracted successfully.")
+                    else:
+                        raise Exception("Could not find chromedriver binary in the downloaded zip file.")
+            
+            tmp_manifest_path = manifest_path + '.tmp'
+            with open(tmp_manifest_path, 'wb') as f:
+                f.write(orjson.dumps({'version': version, 'url': chromedriver_url,
+                                      'sha256': sha256}, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_manifest_path, manifest_path)
                     
         except Exception as e:
             logging.error(f"Failed to download or extract ChromeDriver: {e}")
             raise  # Re-raise the exception to stop execution
             
     else:
-        logging.debug(f"Using existing ChromeDriver at {chromedriver_path}")
+        logging.debug(f"Using cached ChromeDriver at {chromedriver_path}")
 
     # Check if the file is executable
     if not os.access(chromedriver_path, os.X_OK):
@@ -126,106 +291,190 @@ def get_chromedriver_path():
              
     return chromedriver_path
 
-def handle_overlays(driver, timeout=5):
-    """Attempts to find and click common accept/dismiss buttons for overlays (like cookie banners)."""
-    accept_selectors = [
-        "//button[normalize-space(.)='OK']", # Specific selector for Mambu cookie banner
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'allow')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'confirm')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'got it')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'okay')]",
-        "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
-        "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]",
-        "[id*='cookie'] button[class*='accept']",
-        "[id*='consent'] button[class*='accept']",
-        "[aria-label*='consent'] button",
-        "button#hs-eu-confirmation-button", # HubSpot
-        "button#onetrust-accept-btn-handler", # OneTrust
-    ]
-    dismiss_selectors = [
-        "//button[contains(@aria-label, 'Dismiss')]",
-        "//button[contains(@aria-label, 'Close')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'dismiss')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'close')]",
-        "//span[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'close')]", # Sometimes spans act as close buttons
-        "[aria-label*='close']",
-    ]
+# Overlay buttons; accept buttons come first, so a consent banner is accepted rather than just closed
+OVERLAY_ACCEPT_SELECTORS = [
+    "//button[normalize-space(.)='OK']", # Specific selector for Mambu cookie banner
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'allow')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'confirm')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'got it')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'okay')]",
+    "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
+    "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]",
+    "[id*='cookie'] button[class*='accept']",
+    "[id*='consent'] button[class*='accept']",
+    "[aria-label*='consent'] button",
+    "button#hs-eu-confirmation-button", # HubSpot
+    "button#onetrust-accept-btn-handler", # OneTrust
+]
+OVERLAY_DISMISS_SELECTORS = [
+    "//button[contains(@aria-label, 'Dismiss')]",
+    "//button[contains(@aria-label, 'Close')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'dismiss')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'close')]",
+    "//span[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'close')]", # Sometimes spans act as close buttons
+    "[aria-label*='close']",
+]
+OVERLAY_SELECTORS = OVERLAY_ACCEPT_SELECTORS + OVERLAY_DISMISS_SELECTORS
 
-    logging.debug("Attempting to handle overlays...")
+# Clicks the first visible, enabled element matching any of the given XPath or CSS selectors
+# and returns that selector, or null; one round trip instead of a WebDriverWait per selector
+CLICK_FIRST_OVERLAY_SCRIPT = """
+for (const sel of arguments[0]) {
+    let matches;
+    try {
+        if (sel.startsWith('//') || sel.startsWith('(//')) {
+            const snapshot = document.evaluate(sel, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            matches = Array.from({length: snapshot.snapshotLength}, (_, i) => snapshot.snapshotItem(i));
+        } else {
+            matches = document.querySelectorAll(sel);
+        }
+    } catch (e) {
+        continue;
+    }
+    for (const el of matches) {
+        if (!el.disabled && el.getClientRects().length) {
+            el.click();
+            return sel;
+        }
+    }
+}
+return null;
+"""
 
-    # Try accept buttons first
-    for selector in accept_selectors:
-        try:
-            # Wait briefly for the element to be present and clickable
-            wait = WebDriverWait(driver, timeout)
-            # Use XPath for most selectors, handle CSS selectors separately
-            if selector.startswith("//") or selector.startswith("(//"):
-                 element = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-            else:
-                 element = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-
-            logging.info(f"Found potential accept button with selector: {selector}. Attempting to click.")
-            element.click()
-            logging.info("Clicked accept button.")
-            time.sleep(1) # Short pause to allow overlay to disappear
-            return True # Overlay handled
-        except (NoSuchElementException, TimeoutException):
-            logging.debug(f"Accept selector not found or not clickable: {selector}")
-        except ElementClickInterceptedException:
-            logging.warning(f"Accept button click intercepted for selector: {selector}. Trying JavaScript click.")
-            try:
-                 driver.execute_script("arguments[0].click();", element)
-                 logging.info("Clicked accept button using JavaScript.")
-                 time.sleep(1)
-                 return True # Overlay handled
-            except Exception as js_ex:
-                 logging.error(f"JavaScript click failed for {selector}: {js_ex}")
-        except Exception as e:
-            logging.error(f"Error clicking accept button with selector {selector}: {e}")
+def handle_overlays(driver, timeout=5, expect_overlay=False):
+    """Attempts to find and click common accept/dismiss buttons for overlays (like cookie banners).
 
-    # Try dismiss buttons if no accept button worked
-    for selector in dismiss_selectors:
-        try:
-            wait = WebDriverWait(driver, timeout)
-            if selector.startswith("//") or selector.startswith("(//"):
-                element = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-            else:
-                element = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-
-            logging.info(f"Found potential dismiss/close button with selector: {selector}. Attempting to click.")
-            element.click()
-            logging.info("Clicked dismiss/close button.")
-            time.sleep(1)
-            return True # Overlay handled
-        except (NoSuchElementException, TimeoutException):
-            logging.debug(f"Dismiss selector not found or not clickable: {selector}")
-        except ElementClickInterceptedException:
-             logging.warning(f"Dismiss button click intercepted for selector: {selector}. Trying JavaScript click.")
-             try:
-                 driver.execute_script("arguments[0].click();", element)
-                 logging.info("Clicked dismiss button using JavaScript.")
-                 time.sleep(1)
-                 return True # Overlay handled
-             except Exception as js_ex:
-                 logging.error(f"JavaScript click failed for {selector}: {js_ex}")
-        except Exception as e:
-            logging.error(f"Error clicking dismiss button with selector {selector}: {e}")
+    The page is probed once; with expect_overlay=True it is re-probed for up to `timeout`
+    seconds, for overlays that render late."""
+    logging.debug("Attempting to handle overlays...")
+    probe = lambda d: d.execute_script(CLICK_FIRST_OVERLAY_SCRIPT, OVERLAY_SELECTORS)
+    try:
+        if expect_overlay:
+            clicked = WebDriverWait(driver, timeout, poll_frequency=0.25).until(probe)
+        else:
+            clicked = probe(driver)
+    except TimeoutException:
+        clicked = None
+    except Exception as e:
+        logging.error(f"Error probing for overlay buttons: {e}")
+        clicked = None
 
+    if clicked:
+        logging.info(f"Clicked overlay button with selector: {clicked}")
+        time.sleep(1) # Short pause to allow overlay to disappear
+        return True # Overlay handled
 
     logging.debug("No common overlay buttons found or clicked.")
     return False # No overlay handled
 
+def html_to_markdown(html):
+    """Convert an HTML fragment to Markdown with links kept and images dropped."""
+    # A fresh converter per call: HTML2Text keeps its output buffer on the instance.
+    # body_width=0 skips html2text's re-wrapping pass, which is a large share of its
+    # runtime, and keeps paragraphs on one line
+    h = html2text.HTML2Text()
+    h.ignore_links = False
+    h.ignore_images = True
+    h.body_width = 0
+    return h.handle(html).strip()
+
+# Anything shorter is treated as a snippet or an unrendered JS shell rather than page content
+MIN_CONTENT_LENGTH = 100
+
+# Title and content selectors, tried in order
+TITLE_SELECTORS = ['h1', '.page-title', '.documentation-title', '.doc-title', '.content_block_article_head h1']
+CONTENT_SELECTORS = [
+    '.content_block_text',
+    'article.content', 
+    'main[role="main"]', 
+    '#main-content',
+    '.article-body',
+    'div[itemprop="articleBody"]',
+    '.article-content',
+    'div.text',
+    'table', # Try directly finding a table
+]
+
+# Longest wait for a content container to fill in after the simulated interaction
+CONTENT_WAIT_SECONDS = 15
+
+# Scrolls, nudges the mouse, then resolves once any content container holds enough rendered
+# text (watched with a MutationObserver) or the timeout passes, and un-hides the Mambu
+# container's children. Yields use setTimeout rather than requestAnimationFrame, which stalls
+# while the browser window is not visible.
+INTERACT_AND_WAIT_FUNCTION = """
+async (selector, minLength, timeoutMs) => {
+    const pause = ms => new Promise(resolve => setTimeout(resolve, ms));
+    for (const y of [300, 600, 900, 1200]) {
+        window.scrollTo(0, y);
+        await pause(50);
+    }
+    document.body.dispatchEvent(new MouseEvent('mousemove', {bubbles: true, cancelable: true, view: window}));
+
+    const ready = () => Array.from(document.querySelectorAll(selector))
+        .some(e => (e.innerText || '').trim().length > minLength);
+    const loaded = ready() || await new Promise(resolve => {
+        let scheduled = false;
+        const finish = result => { observer.disconnect(); clearTimeout(timer); resolve(result); };
+        // Re-check at most every 50ms however many mutations arrive in between
+        const observer = new MutationObserver(() => {
+            if (scheduled) return;
+            scheduled = true;
+            setTimeout(() => { scheduled = false; if (ready()) finish(true); }, 50);
+        });
+        const timer = setTimeout(() => finish(false), timeoutMs);
+        observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+    });
+
+    const contentContainer = document.querySelector('.content_block_text');
+    if (contentContainer) {
+        contentContainer.querySelectorAll('*').forEach(el => {
+            el.style.display = 'block';
+            el.style.visibility = 'visible';
+            el.style.opacity = '1';
+        });
+    }
+    return loaded;
+}
+"""
+INTERACT_AND_WAIT_EXPRESSION = (f"({INTERACT_AND_WAIT_FUNCTION.strip()})"
+                                f"({orjson.dumps(', '.join(CONTENT_SELECTORS)).decode()}, {MIN_CONTENT_LENGTH}, {CONTENT_WAIT_SECONDS * 1000})")
+
+# Returns the first matching title and the first content element, in selector priority order, whose
+# rendered text is long enough, with its HTML (h) and text (x); only that element is serialized
+PAGE_ELEMENTS_SCRIPT = """
+const [titleSelectors, contentSelectors, minLength] = arguments;
+let title = null;
+for (const sel of titleSelectors) {
+    const el = document.querySelector(sel);
+    if (el) {
+        title = el.textContent.replace(/\\s+/g, ' ').trim();
+        break;
+    }
+}
+for (const sel of contentSelectors) {
+    const els = document.querySelectorAll(sel);
+    for (let i = 0; i < els.length; i++) {
+        const text = (els[i].innerText || '').trim();
+        if (text.length > minLength) {
+            return {title: title, content: {selector: sel, index: i, count: els.length, h: els[i].outerHTML, x: text}};
+        }
+    }
+}
+return {title: title, content: null};
+"""
+
 def extract_page_content(driver, url):
     """Extract content from a single documentation page and convert to markdown"""
     try:
-        logging.info(f"Navigating to {url}")
+        logging.info("Navigating to %s", url)
         driver.get(url)
         # Wait for page title to be present
         WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.TAG_NAME, "title")))
         title = driver.title
-        logging.info(f"Page loaded: {title}")
+        logging.info("Page loaded: %s", title)
 
         # --- Add overlay handling here ---
         logging.debug("Attempting to handle overlays...")
@@ -233,182 +482,85 @@ def extract_page_content(driver, url):
             handle_overlays(driver)
             logging.debug("Finished handling overlays.")
         except Exception as overlay_ex:
-            logging.error(f"Error during handle_overlays call: {overlay_ex}", exc_info=True)
+            logging.error("Error during handle_overlays call: %s", overlay_ex, exc_info=True)
         # --- End overlay handling ---
 
         # --- Simulate user interaction to trigger content loading ---
-        logging.info("Simulating user interaction to trigger content loading...")
+        # Scrolling, the mouse nudge, waiting for content and un-hiding it all run in the page
+        # as one awaited CDP evaluation instead of a chain of round trips and sleeps
+        logging.info("Simulating user interaction and waiting for content to render...")
         try:
-            # Scroll down gradually
-            for scroll_position in [300, 600, 900, 1200]:
-                driver.execute_script(f"window.scrollTo(0, {scroll_position});")
-                time.sleep(1)  # Short pause between scrolls
-                
-            # Move mouse (simulated via JavaScript)
-            driver.execute_script("""
-                // Create and dispatch a mousemove event
-                const evt = new MouseEvent('mousemove', {
-                    bubbles: true,
-                    cancelable: true,
-                    view: window
-                });
-                document.body.dispatchEvent(evt);
-            """)
-            
-            # Wait longer for content to potentially load
-            logging.info("Waiting 10 seconds after user interaction simulation...")
-            time.sleep(10)
-            
-            # Try to force content rendering directly
-            driver.execute_script("""
-                // Try to find the content container
-                const contentContainer = document.querySelector('.content_block_text');
-                if (contentContainer) {
-                    // Log what we found for debugging
-                    console.log('Content container found, content length:', contentContainer.innerHTML.length);
-                    
-                    // Try to expose any hidden elements
-                    Array.from(contentContainer.querySelectorAll('*')).forEach(el => {
-                        el.style.display = 'block';
-                        el.style.visibility = 'visible';
-                        el.style.opacity = '1';
-                    });
-                }
-            """)
-            
-            # One more wait after JavaScript execution
-            time.sleep(5)
-            
+            result = driver.execute_cdp_cmd("Runtime.evaluate", {
+                "expression": INTERACT_AND_WAIT_EXPRESSION,
+                "awaitPromise": True,
+                "returnByValue": True,
+            })
+            if 'exceptionDetails' in result:
+                logging.error("User interaction script failed on %s: %s", url, result['exceptionDetails'].get('text'))
+            elif not result.get('result', {}).get('value'):
+                logging.warning("No content container filled in within %ss on %s; extracting what is there.", CONTENT_WAIT_SECONDS, url)
         except Exception as interact_ex:
-            logging.error(f"Error during user interaction simulation: {interact_ex}")
+            logging.error("Error during user interaction simulation: %s", interact_ex)
         # --- End user interaction simulation ---
 
         logging.debug("Pause finished.")
 
-        logging.debug("Attempting to parse page source with BeautifulSoup...")
+        # Extract title and candidate content elements in one script call instead of
+        # serializing the whole DOM through page_source and re-parsing it with BS4
+        logging.debug("Extracting title and content from the live DOM...")
         try:
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            logging.debug("Successfully parsed page source.")
-        except Exception as parse_ex:
-            logging.error(f"Error parsing page source with BeautifulSoup for {url}: {parse_ex}", exc_info=True)
+            extracted = driver.execute_script(PAGE_ELEMENTS_SCRIPT, TITLE_SELECTORS, CONTENT_SELECTORS, MIN_CONTENT_LENGTH)
+        except Exception as script_ex:
+            logging.error("Error extracting DOM elements for %s: %s", url, script_ex, exc_info=True)
             return None
 
-        # Extract title - try multiple possible locations
-        title = None
-        title_selectors = ['h1', '.page-title', '.documentation-title', '.doc-title', '.content_block_article_head h1'] # Added specific title selector
-        for selector in title_selectors:
-            title_elem = soup.select_one(selector)
-            if title_elem:
-                title = title_elem.text.strip()
-                logging.info(f"Extracted title: '{title}'")
-                break
-        
-        if not title:
+        title = extracted.get('title')
+        if title:
+            logging.info("Extracted title: '%s'", title)
+        else:
             title = "Untitled"
-            logging.warning(f"Could not extract title for {url}, using 'Untitled'.")
+            logging.warning("Could not extract title for %s, using 'Untitled'.", url)
 
         # --- Try Multiple Approaches to Find Content ---
         logging.info("Trying multiple approaches to find content...")
         content_md = ""
         
-        # Approach 1: Standard container finding
-        content_selectors = [
-            '.content_block_text',
-            'article.content', 
-            'main[role="main"]', 
-            '#main-content',
-            '.article-body',
-            'div[itemprop="articleBody"]',
-            '.article-content', # Added more specific selectors
-            'div.text',
-            'table', # Try directly finding a table
-        ]
-        
-        for selector in content_selectors:
-            logging.debug(f"Trying to find content with selector: '{selector}'")
-            elements = soup.select(selector)
-            if elements:
-                logging.info(f"Found {len(elements)} potential content elements with selector: '{selector}'")
-                
-                # Try each found element
-                for i, element in enumerate(elements):
-                    try:
-                        # Try html2text first
-                        html_content = str(element)
-                        h = html2text.HTML2Text()
-                        h.ignore_links = False
-                        h.ignore_images = True
-                        md = h.handle(html_content).strip()
-                        
-                        # If we got substantial content, use it
-                        if md and len(md) > 100:  # Arbitrary length to filter out tiny snippets
-                            logging.info(f"Found substantial content ({len(md)} chars) with selector '{selector}' (element {i+1}/{len(elements)})")
-                            content_md = md
-                            break
-                            
-                        # If html2text doesn't work, try get_text()
-                        text = element.get_text(separator='\n', strip=True)
-                        if text and len(text) > 100:
-                            logging.info(f"Found substantial text content ({len(text)} chars) with selector '{selector}' (element {i+1}/{len(elements)})")
-                            content_md = text
-                            break
-                    except Exception as el_ex:
-                        logging.error(f"Error processing element {i+1} with selector '{selector}': {el_ex}")
-                
-                # If we found content, break out of the selector loop
-                if content_md:
-                    break
+        # Approach 1: Standard container finding. The script already picked the first container
+        # with enough rendered text, so html2text runs once instead of on every candidate
+        found = extracted.get('content')
+        if found:
+            logging.info("Found substantial content with selector '%s' (element %d/%d)", found['selector'], found['index'] + 1, found['count'])
+            try:
+                md = html_to_markdown(found['h'])
+            except Exception as el_ex:
+                logging.error("Error converting content from selector '%s': %s", found['selector'], el_ex)
+                md = ""
+            
+            # If html2text doesn't produce enough, fall back to the rendered text
+            content_md = md if len(md) > MIN_CONTENT_LENGTH else found['x']
         
         # Approach 2: Direct JavaScript Extraction (last resort)
         if not content_md:
             logging.info("Trying direct JavaScript extraction as last resort...")
             try:
-                # Extract text content using JavaScript
+                # innerText is already laid out with block-level line breaks by the
+                # browser; textContent is only used if it comes back blank
                 js_content = driver.execute_script("""
-                    // Try to extract text from the document
-                    const extractText = (element) => {
-                        if (!element) return '';
-                        
-                        // Get all text nodes
-                        const walker = document.createTreeWalker(
-                            element, 
-                            NodeFilter.SHOW_TEXT, 
-                            null, 
-                            false
-                        );
-                        
-                        let text = '';
-                        let node;
-                        while(node = walker.nextNode()) {
-                            if (node.textContent.trim()) {
-                                text += node.textContent.trim() + '\\n';
-                            }
-                        }
-                        return text;
-                    };
-                    
-                    // Try the main content area first
-                    const contentArea = document.querySelector('.content_block_text');
-                    if (contentArea) {
-                        return extractText(contentArea);
-                    }
-                    
-                    // Fall back to main content area
-                    return extractText(document.body);
+                    const el = document.querySelector('.content_block_text') || document.body;
+                    return (el.innerText || '').trim() || (el.textContent || '').trim();
                 """)
                 
-                if js_content and len(js_content) > 100:
-                    logging.info(f"Successfully extracted content ({len(js_content)} chars) via JavaScript")
+                if js_content and len(js_content) > MIN_CONTENT_LENGTH:
+                    logging.info("Successfully extracted content (%d chars) via JavaScript", len(js_content))
                     content_md = js_content
             except Exception as js_ex:
-                logging.error(f"Error during JavaScript content extraction: {js_ex}")
+                logging.error("Error during JavaScript content extraction: %s", js_ex)
         
         if not content_md:
-            logging.warning(f"All approaches failed to extract content from {url}")
+            logging.warning("All approaches failed to extract content from %s", url)
             return None
 
-        logging.info(f"Successfully extracted and formatted content from {url} (length: {len(content_md)})")
+        logging.info("Successfully extracted and formatted content from %s (length: %d)", url, len(content_md))
         return {
             'url': url,
             'title': title,
@@ -416,194 +568,569 @@ def extract_page_content(driver, url):
         }
 
     except Exception as e:
-        logging.error(f"Error extracting content from {url}: {str(e)}", exc_info=True)
+        logging.error("Error extracting content from %s: %s", url, e, exc_info=True)
         return None
 
-def get_all_doc_links(driver, start_url):
-    """Recursively find all unique documentation links starting from a base URL."""
-    logging.info(f"Getting links from: {start_url}")
-    driver.get(start_url)
-    time.sleep(2)  # Allow page to load
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
-    doc_links = set()
-    processed_urls = set([start_url])
-    urls_to_visit = deque([start_url])
+def wait_for_links(driver, timeout=10):
+    """Wait until the page has rendered at least one link, instead of sleeping a fixed time."""
+    try:
+        WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.CSS_SELECTOR, "a[href]")))
+    except TimeoutException:
+        logging.warning("No links appeared within %ss on %s; parsing what is there.", timeout, driver.current_url)
+
+# Concurrent HTTP fetches used for link discovery
+LINK_DISCOVERY_WORKERS = 16
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAM_PREFIXES = ('utm_', 'gclid=', 'fbclid=', 'mc_cid=', 'mc_eid=', '_hsenc=', '_hsmi=', '_ga=')
+
+def canonical_url(url):
+    """Key under which variants of one page compare equal: no fragment, tracking parameters or trailing slash.
+
+    Only for comparing and recording URLs; pages are fetched and links resolved with the real URL,
+    since dropping the trailing slash changes what relative links point at."""
+    # In-page anchors and tracking variants point at the same document; other parameters
+    # (pagination, filters) can select a different one and are kept
+    path, _, query = url.partition('#')[0].partition('?')
+    path = path.rstrip('/')
+    if not query:
+        return path
+    kept = [param for param in query.split('&') if param and not param.startswith(TRACKING_PARAM_PREFIXES)]
+    return path + '?' + '&'.join(kept) if kept else path
+
+# Link discovery reads nothing but <a href> elements
+LINK_STRAINER = SoupStrainer('a', href=True)
+
+def resolve_links(html, page_url, start_scheme, start_origin):
+    """Return the absolute, fragment-free URL of every <a href> on a page, resolved against page_url."""
+    if HTMLParser:
+        hrefs = (node.attributes.get('href') or '' for node in HTMLParser(html).css('a[href]'))
+    else:
+        # Only anchors are built into the tree; everything else is skipped while parsing
+        hrefs = (link['href'] for link in BeautifulSoup(html, 'lxml', parse_only=LINK_STRAINER).find_all('a'))
+    links = []
+    for href in hrefs:
+        # Fast paths for absolute and root-relative hrefs; urljoin only for the rest
+        if href.startswith(('http://', 'https://')):
+            full_url = href
+        elif href.startswith('//'):
+            full_url = start_scheme + ':' + href
+        elif href.startswith('/'):
+            full_url = start_origin + href
+        else:
+            full_url = urljoin(page_url, href)
+        links.append(full_url.partition('#')[0])
+    return links
+
+def fetch_page_links(url, start_scheme, start_origin):
+    """Fetch a page over HTTP and return its links, or None if its static HTML has no doc links."""
+    response = fetch_direct(url)
+    response.raise_for_status()
+    # Relative links are resolved against where the request ended up, after any redirects
+    links = resolve_links(response.text, response.url, start_scheme, start_origin)
+    if not any('/docs/' in link for link in links):
+        return None # Navigation is rendered client-side; the caller falls back to the browser
+    return links
+
+def get_all_doc_links(start_url, max_workers=LINK_DISCOVERY_WORKERS):
+    """Crawl breadth-first for unique documentation links starting from a base URL.
+
+    Pages are fetched concurrently over HTTP; only pages whose static HTML carries no
+    doc links are rendered in a browser, which is started on first use."""
+    start_key = canonical_url(start_url)
+    logging.info("Getting links from: %s", start_url)
+    doc_links = [] # Discovery order; `seen` already guarantees uniqueness
+    seen = {start_key} # Every canonical URL ever checked; nothing is filtered or enqueued twice
+    start_parts = urlsplit(start_url)
+    start_scheme = start_parts.scheme
+    start_origin = f"{start_parts.scheme}://{start_parts.netloc}"
 
     # Define a limit for the number of links to collect during testing
     max_links_to_find = 10 # <-- Updated limit
 
-    while urls_to_visit:
-        current_url = urls_to_visit.popleft()
-        if not current_url.startswith(start_url):
-             logging.debug(f"Skipping external or non-doc link: {current_url}")
-             continue # Stay within the documentation section
+    driver = None
 
-        try:
-            logging.debug(f"Processing URL for links: {current_url}")
-            if current_url not in driver.current_url: # Navigate only if not already there
-                 driver.get(current_url)
-                 time.sleep(1) # Brief pause after navigation
-
-            current_soup = BeautifulSoup(driver.page_source, 'html.parser')
-            links = current_soup.find_all('a', href=True)
-            logging.debug(f"Found {len(links)} potential links on {current_url}")
-
-            for link in links:
-                href = link['href']
-                full_url = urljoin(current_url, href)
-
-                # Basic filtering (adjust as needed)
-                if full_url.startswith(start_url) and '#' not in full_url and full_url not in processed_urls:
-                    if '/docs/' in full_url: # Ensure it looks like a doc page
-                         logging.debug(f"Found potential doc link: {full_url}")
-                         doc_links.add(full_url)
-                         # ---- Stop if we have enough links ----
-                         if len(doc_links) >= max_links_to_find:
-                             logging.info(f"Reached link limit ({max_links_to_find}). Stopping link collection.")
-                             # Convert set to list before returning
-                             final_links = list(doc_links)
-                             logging.info(f"Collected {len(final_links)} unique doc links: {final_links}")
-                             return final_links
-                         # ---- End stop condition ----
-
-                    # Add to processed and queue for visiting only if it's within the scope
-                    # (Even if it's not a /docs/ page itself, it might contain links to them)
-                    processed_urls.add(full_url)
-                    urls_to_visit.append(full_url)
-                elif full_url in processed_urls:
-                     logging.debug(f"Skipping already processed URL: {full_url}")
-                else:
-                     logging.debug(f"Skipping non-matching URL: {full_url}")
+    def browser_links(url):
+        # Only ever called from this thread, so the single driver is never shared
+        nonlocal driver
+        if driver is None:
+            driver = setup_driver()
+        driver.get(url)
+        wait_for_links(driver)
+        return resolve_links(driver.page_source, driver.current_url, start_scheme, start_origin)
 
-        except Exception as e:
-            logging.error(f"Error processing {current_url} for links: {e}")
-            # Continue with the next URL in the queue
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {executor.submit(fetch_page_links, start_url, start_scheme, start_origin): start_url}
+            while pending:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    current_url = pending.pop(future)
+                    try:
+                        links = future.result()
+                        if links is None:
+                            logging.debug("No doc links in the static HTML of %s; rendering it in the browser", current_url)
+                            links = browser_links(current_url)
+                    except Exception as e:
+                        logging.error("Error processing %s for links: %s", current_url, e)
+                        continue # Continue with the rest of the frontier
+                    logging.debug("Found %d potential links on %s", len(links), current_url)
+
+                    for full_url in links:
+                        # Basic filtering (adjust as needed); the canonical form is only the dedup key
+                        url_key = canonical_url(full_url)
+                        if not url_key or url_key in seen:
+                            continue
+                        seen.add(url_key)
+                        if url_key.startswith(start_key):
+                            if '/docs/' in url_key: # Ensure it looks like a doc page
+                                logging.debug("Found potential doc link: %s", full_url)
+                                doc_links.append(full_url)
+                                # ---- Stop if we have enough links ----
+                                if len(doc_links) >= max_links_to_find:
+                                    logging.info("Reached link limit (%s). Stopping link collection.", max_links_to_find)
+                                    for queued in pending:
+                                        queued.cancel()
+                                    logging.info("Collected %d unique doc links: %s", len(doc_links), doc_links)
+                                    return doc_links
+                                # ---- End stop condition ----
+
+                            # Queue for visiting only if it's within the scope
+                            # (Even if it's not a /docs/ page itself, it might contain links to them)
+                            pending[executor.submit(fetch_page_links, full_url, start_scheme, start_origin)] = full_url
+                        else:
+                            logging.debug("Skipping non-matching URL: %s", full_url)
+    finally:
+        if driver:
+            driver.quit()
+            logging.info("Link discovery browser closed.")
 
-    # Convert set to list if loop finishes before limit is reached
-    final_links = list(doc_links)
-    logging.info(f"Finished collecting links. Found {len(final_links)} unique doc links: {final_links}")
-    return final_links
+    logging.info("Finished collecting links. Found %d unique doc links: %s", len(doc_links), doc_links)
+    return doc_links
 
 # --- Restore Saving Functions --- 
+# Output files are written with a 1 MiB buffer rather than the 8 KiB default
+OUTPUT_BUFFER_SIZE = 1 << 20
+
 def save_as_json(data, filename):
     """Saves the scraped data as a JSON file."""
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # orjson encodes straight to UTF-8 bytes in one write (same 2-space layout)
+        with open(filename, 'wb', buffering=OUTPUT_BUFFER_SIZE) as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
         logging.info(f"JSON data saved to: {filename}")
     except IOError as e:
         logging.error(f"Error saving JSON file {filename}: {e}")
     except TypeError as e:
         logging.error(f"Error serializing data to JSON for {filename}: {e}")
 
-def save_as_markdown(data, filename, total_links):
-    """Saves the scraped data as a Markdown file suitable for LLMs."""
-    try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("# Mambu Documentation\n\n")
-            f.write(f"*Generated on: {data.get('scrape_timestamp', datetime.now().isoformat())}*\n\n")
-            f.write(f"*Based on {len(data.get('pages', []))} scraped pages (out of {total_links} found links)*\n\n") # Add context
-            f.write("## Table of Contents\n\n")
-            
-            # Generate table of contents only if pages exist
-            if data.get('pages'):
-                for i, page in enumerate(data['pages']):
-                    # Create a simple anchor based on page index or title
-                    anchor = f"page-{i+1}-{page.get('title', 'untitled').lower().replace(' ', '-').replace('/', '')}"
-                    anchor = re.sub(r'[^a-z0-9-]', '', anchor) # Sanitize anchor
-                    f.write(f"- [{page.get('title', 'Untitled')}](#{anchor})\n")
-            else:
-                f.write("_(No pages successfully scraped to generate table of contents)_\n")
-            
-            f.write("\n---\n\n")
-            
-            # Write each page's content if pages exist
-            if data.get('pages'):
-                for i, page in enumerate(data['pages']):
-                    anchor = f"page-{i+1}-{page.get('title', 'untitled').lower().replace(' ', '-').replace('/', '')}"
-                    anchor = re.sub(r'[^a-z0-9-]', '', anchor) # Sanitize anchor
-                    # Add an anchor target div for robustness
-                    f.write(f'<div id="{anchor}"></div>\n') 
-                    f.write(f"# {page.get('title', 'Untitled')}\n")
-                    f.write(f"*Source: [{page.get('url')}]({page.get('url')})*\n\n")
-                    f.write(page.get('content', '_No content extracted_'))
-                    f.write("\n\n---\n\n")
-            else:
-                f.write("_No content extracted for any pages._\n")
+# Letters-only words: digits (dates, counters, versions) don't make a page distinct
+_WORD_RE = re.compile(r'[a-z]+')
 
-        logging.info(f"Markdown data saved to: {filename}")
-    except IOError as e:
-        logging.error(f"Error saving Markdown file {filename}: {e}")
+if xxhash:
+    hash64 = xxhash.xxh3_64_intdigest
+    content_digest = xxhash.xxh3_128_digest
+else:
+    def hash64(data):
+        """64-bit integer hash of bytes."""
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+    def content_digest(data):
+        """128-bit digest of bytes."""
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+class NearDuplicateFilter:
+    """Recognizes pages whose text nearly matches one already kept, by 64-bit SimHash of word 3-shingles."""
+
+    MAX_DISTANCE = 3
+    # Fingerprints within 3 differing bits must agree on at least one of four 16-bit bands,
+    # so only fingerprints sharing a band are ever compared
+    BANDS = 4
+
+    def __init__(self):
+        self.band_index = [{} for _ in range(self.BANDS)]
+        # Digests of every page seen, so exact copies are caught without computing a SimHash
+        self.digests = set()
+
+    @staticmethod
+    def fingerprint(text):
+        """64-bit SimHash of the text, or None if it has no words to shingle."""
+        words = _WORD_RE.findall(text.lower())
+        if not words:
+            return None
+        shingles = [' '.join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))]
+        bits = [format(hash64(shingle.encode()), '064b') for shingle in shingles]
+        # Majority vote per bit position; zip(*) turns the 64-char bit strings into columns in C
+        half = len(bits) / 2
+        fingerprint = 0
+        for column in zip(*bits):
+            fingerprint = (fingerprint << 1) | (column.count('1') > half)
+        return fingerprint
+
+    def is_duplicate(self, text):
+        """Return True if text is a near-duplicate of a kept page; otherwise keep it and return False."""
+        digest = content_digest(text.encode('utf-8', 'ignore'))
+        if digest in self.digests:
+            return True
+        self.digests.add(digest)
+        fingerprint = self.fingerprint(text)
+        if fingerprint is None:
+            # Code- or table-only pages would all share one SimHash; the exact digest above decides them
+            return False
+        bands = [(fingerprint >> (16 * b)) & 0xFFFF for b in range(self.BANDS)]
+        for index, band in zip(self.band_index, bands):
+            for other in index.get(band, ()):
+                if bin(fingerprint ^ other).count('1') <= self.MAX_DISTANCE:
+                    return True
+        for index, band in zip(self.band_index, bands):
+            index.setdefault(band, []).append(fingerprint)
+        return False
+
+class JsonlStreamWriter:
+    """Appends each page to a Zstandard-compressed JSON Lines file as it is scraped.
+
+    The legacy plaintext JSON document can be built from it on close."""
+
+    # Pages between explicit flushes, bounding what a crash or Ctrl-C can lose
+    FLUSH_EVERY = 10
+    # Compression level for the archive; text this repetitive shrinks several-fold
+    ZSTD_LEVEL = 9
+
+    def __init__(self, filename):
+        self.filename = filename
+        raw = open(filename, 'wb', buffering=OUTPUT_BUFFER_SIZE)
+        self.file = zstandard.ZstdCompressor(level=self.ZSTD_LEVEL).stream_writer(raw)
+        self.count = 0
+
+    def add_page(self, page):
+        """Append one page as a single JSON line."""
+        self.file.write(orjson.dumps(page, option=orjson.OPT_APPEND_NEWLINE))
+        self.count += 1
+        if self.count % self.FLUSH_EVERY == 0:
+            # End the current zstd block so everything written so far can be decompressed
+            self.file.flush(zstandard.FLUSH_BLOCK)
+
+    def close(self, json_filename=None, scrape_timestamp=None):
+        """Finish the .jsonl.zst file and, if json_filename is given, write the
+        {'pages': [...], 'scrape_timestamp': ...} JSON from it.
+
+        Pages are decompressed and copied across one line at a time, so neither file is ever
+        held in memory; the result is byte-identical to dumping the whole document with OPT_INDENT_2."""
+        self.file.close()
+        logging.info(f"Compressed JSON Lines data saved to: {self.filename}")
+        if json_filename is None:
+            return
+        try:
+            with open(self.filename, 'rb') as raw, open(json_filename, 'wb', buffering=OUTPUT_BUFFER_SIZE) as f:
+                src = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw))
+                f.write(b'{\n  "pages": [')
+                separator = b'\n    '
+                for line in src:
+                    # Re-indent the page two levels deep to sit inside the pages array
+                    page = orjson.dumps(orjson.loads(line), option=orjson.OPT_INDENT_2)
+                    f.write(separator + page.replace(b'\n', b'\n    '))
+                    separator = b',\n    '
+                if self.count:
+                    f.write(b'\n  ')
+                f.write(b'],\n  "scrape_timestamp": ' + orjson.dumps(scrape_timestamp) + b'\n}')
+            logging.info(f"JSON data saved to: {json_filename}")
+        except (IOError, orjson.JSONDecodeError, zstandard.ZstdError) as e:
+            logging.error(f"Error writing {json_filename} from {self.filename}: {e}")
+
+# Characters dropped from Markdown anchors, compiled once rather than per page
+_ANCHOR_RE = re.compile(r'[^a-z0-9-]')
+
+class MarkdownStreamWriter:
+    """Writes pages to the Markdown output as they are scraped; the header and table of contents are added on close."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.body_filename = filename + ".part"
+        self.body = open(self.body_filename, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE)
+        self.toc_lines = []
+
+    def add_page(self, page):
+        """Append one page's section to the document body."""
+        i = len(self.toc_lines)
+        # Create a simple anchor based on page index or title. Only the title part needs
+        # sanitizing (which also drops '/'), so no intermediate strings are built for the rest
+        anchor = f"page-{i+1}-" + _ANCHOR_RE.sub('', page.get('title', 'untitled').lower().replace(' ', '-'))
+        self.toc_lines.append(f"- [{page.get('title', 'Untitled')}](#{anchor})\n")
+        # Add an anchor target div for robustness
+        self.body.write("".join([
+            f'<div id="{anchor}"></div>\n',
+            f"# {page.get('title', 'Untitled')}\n",
+            f"*Source: [{page.get('url')}]({page.get('url')})*\n\n",
+            page.get('content', '_No content extracted_'),
+            "\n\n---\n\n"
+        ]))
+
+    def close(self, scrape_timestamp, total_links):
+        """Write the final Markdown file suitable for LLMs: header, table of contents, then the streamed body."""
+        self.body.close()
+        try:
+            with open(self.filename, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as f:
+                f.write("# Mambu Documentation\n\n")
+                f.write(f"*Generated on: {scrape_timestamp}*\n\n")
+                f.write(f"*Based on {len(self.toc_lines)} scraped pages (out of {total_links} found links)*\n\n") # Add context
+                f.write("## Table of Contents\n\n")
+                # Generate table of contents only if pages exist
+                if self.toc_lines:
+                    f.write("".join(self.toc_lines))
+                else:
+                    f.write("_(No pages successfully scraped to generate table of contents)_\n")
+                f.write("\n---\n\n")
+                
+                if self.toc_lines:
+                    with open(self.body_filename, 'r', encoding='utf-8') as body:
+                        shutil.copyfileobj(body, f, OUTPUT_BUFFER_SIZE)
+                else:
+                    f.write("_No content extracted for any pages._\n")
+            logging.info(f"Markdown data saved to: {self.filename}")
+        except IOError as e:
+            logging.error(f"Error saving Markdown file {self.filename}: {e}")
+        finally:
+            os.remove(self.body_filename)
 # --- End Restore Saving Functions --- 
 
-def download_page_direct(url):
-    """Attempt to download and extract content directly using requests without a browser."""
-    logging.info(f"Attempting direct download of: {url}")
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://support.mambu.com/docs',
-    }
+# --- Direct HTTP session ---
+# One pooled keep-alive session for every direct download, so the TLS handshake
+# is paid once per connection instead of once per page
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://support.mambu.com/docs',
+})
+# Up to 64 pooled keep-alive connections per host, enough for the discovery and page
+# worker pools even when raised from the command line. Status-code retries are left to
+# fetch_direct, so urllib3 only retries connection errors
+_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=64,
+                                       max_retries=Retry(total=3, backoff_factor=0.5)))
+
+# (connect, read) timeouts: a dead host fails fast while slow pages still get time to arrive
+DIRECT_TIMEOUT = (5, 20)
+
+# Direct requests allowed per second to any one host, and the statuses worth retrying
+DIRECT_REQUESTS_PER_HOST = 8
+RETRY_STATUSES = (429, 502, 503, 504)
+
+class HostRateLimiter:
+    """Spaces requests to each host, reserving slots so waiting threads don't queue on the lock.
+
+    The spacing adapts per host: it doubles (up to MAX_INTERVAL) whenever the host pushes
+    back and halves again after SPEEDUP_AFTER consecutive successes, never going below the
+    configured rate."""
+
+    MAX_INTERVAL = 10.0
+    SPEEDUP_AFTER = 10
+
+    def __init__(self, calls_per_second=DIRECT_REQUESTS_PER_HOST):
+        self.min_interval = 1.0 / calls_per_second
+        self.intervals = {}
+        self.successes = {}
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            current_time = time.monotonic()
+            slot = max(current_time, self.next_slot.get(host, 0))
+            self.next_slot[host] = slot + self.intervals.get(host, self.min_interval)
+        if slot > current_time:
+            time.sleep(slot - current_time)
+
+    def record(self, url, throttled):
+        """Slow the host down after a 429/5xx push-back, speed it back up after a run of successes."""
+        host = urlsplit(url).netloc
+        with self.lock:
+            interval = self.intervals.get(host, self.min_interval)
+            if throttled:
+                self.successes[host] = 0
+                self.intervals[host] = min(interval * 2, self.MAX_INTERVAL)
+            else:
+                self.successes[host] = self.successes.get(host, 0) + 1
+                if self.successes[host] >= self.SPEEDUP_AFTER and interval > self.min_interval:
+                    self.successes[host] = 0
+                    self.intervals[host] = max(interval / 2, self.min_interval)
+
+    def pause(self, url, seconds):
+        """Hold back every request to the URL's host for at least `seconds`."""
+        host = urlsplit(url).netloc
+        with self.lock:
+            self.next_slot[host] = max(self.next_slot.get(host, 0), time.monotonic() + seconds)
+
+_HOST_LIMITER = HostRateLimiter()
+_backoff = wait_exponential(multiplier=1, max=30)
+
+def retry_after_seconds(response):
+    """Return a numeric Retry-After header capped at 30s, or None."""
+    retry_after = response.headers.get('Retry-After', '')
+    return min(float(retry_after), 30) if retry_after.isdigit() else None
+
+def _wait_for_retry(retry_state):
+    delay = retry_after_seconds(retry_state.outcome.result())
+    return _backoff(retry_state) if delay is None else delay
+
+@retry(wait=_wait_for_retry,
+       retry=retry_if_result(lambda response: response.status_code in RETRY_STATUSES),
+       stop=stop_after_attempt(5),
+       retry_error_callback=lambda retry_state: retry_state.outcome.result())
+def fetch_direct(url, headers=None):
+    """GET a URL through the shared session, rate limited per host and retried with backoff on 429/5xx gateway errors."""
+    _HOST_LIMITER.wait(url)
+    response = _SESSION.get(url, headers=headers, timeout=DIRECT_TIMEOUT)
+    _HOST_LIMITER.record(url, throttled=response.status_code in RETRY_STATUSES)
+    if response.status_code in RETRY_STATUSES:
+        delay = retry_after_seconds(response)
+        logging.warning("HTTP %s from %s; backing off", response.status_code, url)
+        if delay:
+            # Slow down every worker on this host, not just the one that was told to
+            _HOST_LIMITER.pause(url, delay)
+    return response
+
+# Validators and extracted pages from earlier runs, kept in the output directory
+PAGE_CACHE_FILENAME = ".page_cache.json"
+
+class PageCache:
+    """ETag/Last-Modified validators and the page extracted for each URL, so unchanged pages
+    come back as a 304 and are reused instead of being downloaded and parsed again."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, 'rb') as f:
+                self.entries = orjson.loads(f.read())
+        except FileNotFoundError:
+            self.entries = {}
+        except (IOError, orjson.JSONDecodeError) as e:
+            logging.warning(f"Ignoring unreadable page cache {path}: {e}")
+            self.entries = {}
+
+    def conditional_headers(self, url):
+        """Return If-None-Match/If-Modified-Since headers for a cached URL, or None."""
+        entry = self.entries.get(canonical_url(url))
+        if not entry:
+            return None
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers or None
+
+    def get(self, url):
+        """Return the page cached for a URL, or None."""
+        entry = self.entries.get(canonical_url(url))
+        return entry['page'] if entry else None
+
+    def store(self, url, response, page):
+        """Remember a freshly extracted page if the server sent validators for it."""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not (etag or last_modified):
+            return
+        with self.lock:
+            self.entries[canonical_url(url)] = {'etag': etag, 'last_modified': last_modified, 'page': page}
+
+    def save(self):
+        """Write the cache atomically, so an interrupted run never leaves it truncated."""
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(self.entries))
+            os.replace(tmp_path, self.path)
+            logging.info(f"Page cache saved to: {self.path} ({len(self.entries)} pages)")
+        except IOError as e:
+            logging.error(f"Error saving page cache {self.path}: {e}")
+
+# Content containers looked for in server-rendered pages
+DIRECT_CONTENT_SELECTORS = [
+    '.content_block_text',
+    'article.content', 
+    'main[role="main"]', 
+    '#main-content',
+    '.article-body',
+    'div[itemprop="articleBody"]',
+]
+
+def parse_body(html):
+    """Parse a page and return its <body>; the selectors only ever match inside it."""
+    tree = HTMLParser(html) if HTMLParser else BeautifulSoup(html, 'lxml')
+    return tree.body or tree
+
+def select_one(root, selector):
+    """First element under root matching a CSS selector, for either parser."""
+    return root.css_first(selector) if HTMLParser else root.select_one(selector)
+
+def element_text(element, separator):
+    """Text of an element with each piece stripped, joined by separator, for either parser."""
+    return element.text(separator=separator, strip=True) if HTMLParser else element.get_text(separator, strip=True)
+
+def element_html(element):
+    """Outer HTML of an element, for either parser."""
+    return element.html if HTMLParser else str(element)
+
+def select_first(soup, selectors):
+    """Return (selector, element) for the first selector, in priority order, that matches, or (None, None)."""
+    for selector in selectors:
+        element = select_one(soup, selector)
+        if element:
+            return selector, element
+    return None, None
+
+def download_page_direct(url, page_cache=None):
+    """Attempt to download and extract content directly using requests without a browser.
+
+    With a page_cache the request is conditional, and a page the server reports unchanged is reused as is."""
+    logging.info("Attempting direct download of: %s", url)
     
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        headers = page_cache.conditional_headers(url) if page_cache else None
+        response = fetch_direct(url, headers=headers)
+        if response.status_code == 304 and headers:
+            logging.info("%s is unchanged since the last run; reusing the cached page", url)
+            return page_cache.get(url)
         if response.status_code != 200:
-            logging.error(f"Failed to download {url}: HTTP status {response.status_code}")
+            logging.error("Failed to download %s: HTTP status %s", url, response.status_code)
             return None
             
-        logging.info(f"Successfully downloaded {url} (content size: {len(response.text)} bytes)")
+        logging.info("Successfully downloaded %s (content size: %d bytes)", url, len(response.text))
         
-        # Parse the HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
+        # Parse the HTML (with selectolax when installed)
+        soup = parse_body(response.text)
         
         # Extract title
         title = None
-        title_selectors = ['h1', '.page-title', '.documentation-title', '.doc-title', '.content_block_article_head h1'] 
-        for selector in title_selectors:
-            title_elem = soup.select_one(selector)
-            if title_elem:
-                title = title_elem.text.strip()
-                logging.info(f"Extracted title directly: '{title}'")
-                break
+        _, title_elem = select_first(soup, TITLE_SELECTORS)
+        if title_elem:
+            title = element_text(title_elem, ' ')
+            logging.info("Extracted title directly: '%s'", title)
                 
         if not title:
             title = "Untitled"
-            logging.warning(f"Could not extract title directly from {url}, using 'Untitled'.")
+            logging.warning("Could not extract title directly from %s, using 'Untitled'.", url)
         
         # Extract content
-        content_selectors = [
-            '.content_block_text',
-            'article.content', 
-            'main[role="main"]', 
-            '#main-content',
-            '.article-body',
-            'div[itemprop="articleBody"]',
-        ]
-        
-        main_content = None
-        for selector in content_selectors:
-            main_content = soup.select_one(selector)
-            if main_content:
-                logging.info(f"Found content container using selector: '{selector}' via direct download")
-                break
+        selector, main_content = select_first(soup, DIRECT_CONTENT_SELECTORS)
+        if main_content:
+            logging.info("Found content container using selector: '%s' via direct download", selector)
         
         if not main_content:
-            logging.warning(f"No content container found in direct download of {url}")
+            logging.warning("No content container found in direct download of %s", url)
             return None
             
         # First try html2text for a nicely formatted result
         content_md = ""
         try:
-            container_html = str(main_content)
-            h = html2text.HTML2Text()
-            h.ignore_links = False
-            h.ignore_images = True
-            content_md = h.handle(container_html).strip()
-            logging.info(f"Successfully converted direct download content to Markdown (length: {len(content_md)})")
+            container_html = element_html(main_content)
+            content_md = html_to_markdown(container_html)
+            logging.info("Successfully converted direct download content to Markdown (length: %d)", len(content_md))
         except Exception as HtEx:
-            logging.error(f"html2text conversion failed for direct download content: {str(HtEx)}")
+            logging.error("html2text conversion failed for direct download content: %s", HtEx)
             # Fall back to simple text extraction
             content_md = ""
             
@@ -611,35 +1138,118 @@ def download_page_direct(url):
         if not content_md:
             logging.warning("html2text failed on direct download content. Falling back to simple text extraction.")
             try:
-                content_md = main_content.get_text(separator='\n', strip=True)
+                content_md = element_text(main_content, '\n')
                 if content_md:
-                    logging.info(f"Successfully extracted text using simple fallback (length: {len(content_md)})")
+                    logging.info("Successfully extracted text using simple fallback (length: %d)", len(content_md))
                 else:
                     logging.warning("Simple text extraction fallback also yielded no content from direct download")
             except Exception as fallback_ex:
-                logging.error(f"Error during fallback text extraction from direct download: {fallback_ex}")
+                logging.error("Error during fallback text extraction from direct download: %s", fallback_ex)
         
         if not content_md.strip():
-            logging.warning(f"No content extracted from direct download of {url}")
+            logging.warning("No content extracted from direct download of %s", url)
+            return None
+        if len(content_md) <= MIN_CONTENT_LENGTH:
+            # The container is there but empty: the page is rendered client-side, leave it to the browsers
+            logging.info("Direct download of %s only yielded %d chars; deferring to browser rendering", url, len(content_md))
             return None
             
-        logging.info(f"Successfully extracted content via direct download from {url} (length: {len(content_md)})")
-        return {
+        logging.info("Successfully extracted content via direct download from %s (length: %d)", url, len(content_md))
+        page = {
             'url': url,
             'title': title,
             'content': content_md
         }
+        if page_cache:
+            page_cache.store(url, response, page)
+        return page
         
     except Exception as e:
-        logging.error(f"Error during direct download of {url}: {str(e)}")
+        logging.error("Error during direct download of %s: %s", url, e)
         return None
 
+# --- Selenium fallback pool ---
+# Default number of Chrome instances rendering pages that the direct download could not handle.
+# Each Chrome is its own process, so plain threads driving them scale with cores
+SELENIUM_WORKERS = 3
+
+_thread_local = threading.local()
+_pool_drivers = []
+_pool_lock = threading.Lock()
+
+def get_thread_driver():
+    """Return the calling worker thread's own driver, starting it on first use (WebDriver is not thread-safe)."""
+    driver = getattr(_thread_local, 'driver', None)
+    if driver is None:
+        driver = setup_driver()
+        _thread_local.driver = driver
+        with _pool_lock:
+            _pool_drivers.append(driver)
+    return driver
+
+def discard_thread_driver():
+    """Quit the calling thread's driver and forget it, so its next page starts a fresh browser."""
+    driver = getattr(_thread_local, 'driver', None)
+    if driver is None:
+        return
+    _thread_local.driver = None
+    with _pool_lock:
+        if driver in _pool_drivers:
+            _pool_drivers.remove(driver)
+    try:
+        driver.quit()
+    except Exception as e:
+        logging.debug("Error closing crashed browser: %s", e)
+
+def quit_pool_drivers():
+    """Quit every driver started by get_thread_driver."""
+    with _pool_lock:
+        drivers = list(_pool_drivers)
+        _pool_drivers.clear()
+    for driver in drivers:
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.warning(f"Error closing pooled browser: {e}")
+    logging.info(f"Closed {len(drivers)} pooled browser(s).")
+
+def extract_page_content_pooled(url):
+    """Render a page on the calling thread's driver."""
+    # Politeness is per host and shared with the direct downloads, not a fixed sleep per page
+    _HOST_LIMITER.wait(url)
+    driver = get_thread_driver()
+    page = extract_page_content(driver, url)
+    if page is None:
+        # A crashed or hung Chrome would otherwise fail every later page on this thread
+        try:
+            driver.execute_script("return 1")
+        except WebDriverException as e:
+            logging.warning("Browser session lost while rendering %s, restarting it: %s", url, e.msg)
+            discard_thread_driver()
+    return page
+
+# Canonical URLs of every page scraped into an output directory, one per line, across runs
+SEEN_URLS_FILENAME = ".seen_urls"
+
+def load_seen_urls(path):
+    """Read the canonical URLs recorded by earlier runs."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return {line.rstrip('\n') for line in f}
+    except FileNotFoundError:
+        return set()
+
 def main():
     parser = argparse.ArgumentParser(description="Scrape Mambu documentation.")
     parser.add_argument("--start_url", default="https://support.mambu.com/docs", help="The starting URL for scraping.")
     parser.add_argument("--max_depth", type=int, default=100, help="Maximum depth for crawling links from the start URL. Set to 0 to only scrape the start_url itself.")
     parser.add_argument("--output_dir", default=".", help="Directory to save the output files.")
     parser.add_argument("--log_level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], help="Set the logging level.")
+    parser.add_argument("--max_workers", type=int, default=8, help="Number of pages to download concurrently over HTTP.")
+    parser.add_argument("--browser_workers", type=int, default=SELENIUM_WORKERS, help="Number of Chrome instances rendering pages the direct download could not handle.")
+    parser.add_argument("--skip_seen", action="store_true", help=f"Skip pages already scraped by earlier runs into the same output directory (tracked in {SEEN_URLS_FILENAME}).")
+    parser.add_argument("--legacy_json", action="store_true", help="Also write the plaintext indented JSON document alongside the compressed .jsonl.zst archive.")
+    parser.add_argument("--discovery_workers", type=int, default=LINK_DISCOVERY_WORKERS, help="Number of pages fetched concurrently while discovering links.")
     
     args = parser.parse_args()
     
@@ -653,9 +1263,11 @@ def main():
     # Create output directory if it doesn't exist
     os.makedirs(args.output_dir, exist_ok=True)
     
-    driver = None
+    # No browser is started up front: link discovery and the page pass each start
+    # Chrome only if some page cannot be handled over plain HTTP
+    seen_path = os.path.join(args.output_dir, SEEN_URLS_FILENAME)
+    outputs_opened = False
     try:
-        driver = setup_driver()
         start_time = datetime.now()
         
         # Determine links to scrape
@@ -667,70 +1279,129 @@ def main():
         else:
             # Normal case: Collect links based on start_url and max_depth
             logging.info("Collecting documentation links...")
-            doc_links = get_all_doc_links(driver, args.start_url)
+            doc_links = get_all_doc_links(args.start_url, max_workers=args.discovery_workers)
             total_links_found = len(doc_links)
             logging.info(f"Found {total_links_found} unique documentation pages.")
             
-            # Limit the number of pages to scrape based on internal setting
+            candidates = doc_links
+            if args.skip_seen:
+                # Drop pages earlier runs already scraped before the limit below is applied
+                seen_urls = load_seen_urls(seen_path)
+                logging.info(f"Skipping pages already scraped by earlier runs ({len(seen_urls)} recorded).")
+                candidates = (url for url in doc_links if canonical_url(url) not in seen_urls)
+            
+            # Limit the number of pages to scrape based on internal setting. islice stops the
+            # (possibly filtered) iteration as soon as the limit is reached
             max_pages_limit = 10
-            links_to_scrape = list(doc_links)[:max_pages_limit]
+            links_to_scrape = list(islice(candidates, max_pages_limit))
+            # Group pages by host (stable, so discovery order holds within a host) so consecutive
+            # requests find a warm keep-alive connection in that host's pool
+            links_to_scrape.sort(key=lambda url: urlsplit(url).netloc)
             if len(links_to_scrape) < total_links_found:
                 logging.info(f"Limiting scrape to the first {len(links_to_scrape)} pages based on internal test limit.")
             else:
                 logging.info(f"Preparing to scrape all {len(links_to_scrape)} found pages.")
         
-        documentation = {'pages': [], 'scrape_timestamp': start_time.isoformat()}
+        scrape_timestamp = start_time.isoformat()
         scraped_count = 0
         
-        if not links_to_scrape:
-            logging.warning("No links found or determined to scrape. Exiting.")
-        else:
-            logging.info(f"Starting scraping process for {len(links_to_scrape)} page(s)...")
-            for i, url in enumerate(links_to_scrape):
-                logging.info(f"Scraping page {i+1}/{len(links_to_scrape)}: {url}")
-                
-                # Use the PDF extraction method
-                page_data = extract_page_content(driver, url)
-                
-                # Fall back to other methods if PDF extraction fails
-                if not page_data:
-                    logging.info(f"PDF extraction failed, attempting with direct download.")
-                    page_data = download_page_direct(url)
-                    
-                    if not page_data:
-                        logging.info(f"Direct download failed, attempting with browser automation.")
-                        page_data = extract_page_content(driver, url)
-                
-                if page_data:
-                    documentation['pages'].append(page_data)
-                    scraped_count += 1
-                    logging.info(f"Successfully scraped and added: {url}")
-                else:
-                    logging.warning(f"Failed to extract content for: {url}")
-                
-                # Add a small delay between requests
-                time.sleep(1)
-        
-        # Save the results
+        # Output filenames are fixed up front so pages can be written out as they complete
         timestamp = start_time.strftime("%Y%m%d_%H%M%S")
-        json_filename = os.path.join(args.output_dir, f"mambu_documentation_{timestamp}.json")
+        json_filename = os.path.join(args.output_dir, f"mambu_documentation_{timestamp}.json") if args.legacy_json else None
+        jsonl_filename = os.path.join(args.output_dir, f"mambu_documentation_{timestamp}.jsonl.zst")
         md_filename = os.path.join(args.output_dir, f"mambu_documentation_{timestamp}.md")
+        jsonl_writer = JsonlStreamWriter(jsonl_filename)
+        md_writer = MarkdownStreamWriter(md_filename)
+        # Line-buffered, so every recorded URL reaches the file even if the process is killed
+        seen_file = open(seen_path, 'a', encoding='utf-8', buffering=1)
+        page_cache = PageCache(os.path.join(args.output_dir, PAGE_CACHE_FILENAME))
+        outputs_opened = True
+        completed = False
+        try:
+            near_duplicates = NearDuplicateFilter()
+            suppressed_count = 0
+            # Bound once: record_page runs for every completed page on the dispatch thread
+            write_seen = seen_file.write
+            is_duplicate = near_duplicates.is_duplicate
+            add_json_page = jsonl_writer.add_page
+            add_md_page = md_writer.add_page
+            log_info = logging.info
         
-        logging.info(f"Saving results to {json_filename} and {md_filename}")
-        save_as_json(documentation, json_filename)
-        save_as_markdown(documentation, md_filename, total_links_found)
+            def record_page(url, page_data):
+                nonlocal scraped_count, suppressed_count
+                if is_duplicate(page_data['content']):
+                    suppressed_count += 1
+                    log_info("Suppressed near-duplicate page: %s", url)
+                    return
+                add_json_page(page_data)
+                add_md_page(page_data)
+                # Only pages actually written out are recorded, so suppressed ones are retried next run
+                write_seen(canonical_url(url) + "\n")
+                scraped_count += 1
+                log_info("Successfully scraped and added: %s", url)
+        
+            if not links_to_scrape:
+                logging.warning("No links found or determined to scrape. Exiting.")
+            else:
+                logging.info(f"Starting scraping process for {len(links_to_scrape)} page(s)...")
+            
+                # Most doc pages are server-rendered, so fetch them all over plain HTTP
+                # concurrently first; only the misses go through the browsers.
+                # Results are recorded on this thread as they complete, so a slow page never holds
+                # back the ones behind it and the writers need no locking.
+                logging.info(f"Fetching pages directly with {args.max_workers} workers...")
+                missing = []
+                with concurrent.futures.ThreadPoolExecutor(max_workers=args.max_workers) as executor:
+                    futures = {executor.submit(download_page_direct, url, page_cache): url for url in links_to_scrape}
+                    for future in concurrent.futures.as_completed(futures):
+                        url = futures[future]
+                        page_data = future.result()
+                        if page_data:
+                            record_page(url, page_data)
+                        else:
+                            missing.append(url)
+            
+                if missing:
+                    browser_workers = min(args.browser_workers, len(missing))
+                    logging.info(f"Direct download failed for {len(missing)} page(s), attempting with browser automation ({browser_workers} browsers)...")
+                    try:
+                        with concurrent.futures.ThreadPoolExecutor(max_workers=browser_workers) as executor:
+                            futures = {executor.submit(extract_page_content_pooled, url): url for url in missing}
+                            for future in concurrent.futures.as_completed(futures):
+                                url = futures[future]
+                                page_data = future.result()
+                                if page_data:
+                                    record_page(url, page_data)
+                                else:
+                                    logging.warning("Failed to extract content for: %s", url)
+                    finally:
+                        quit_pool_drivers()
+            completed = True
+        finally:
+            # Runs on errors and Ctrl-C too, so the pages scraped so far end up in a valid
+            # archive and Markdown file and the seen list and page cache are kept
+            seen_file.close()
+            page_cache.save()
+            
+            # Save the results; the legacy JSON is only rebuilt from a completed run
+            logging.info(f"Saving results to {jsonl_filename} and {md_filename}")
+            jsonl_writer.close(json_filename if completed else None, scrape_timestamp)
+            md_writer.close(scrape_timestamp, total_links_found)
         
         end_time = datetime.now()
         duration = end_time - start_time
         logging.info(f"Documentation scraping finished in {duration}")
-        logging.info(f"Successfully scraped {scraped_count}/{len(links_to_scrape)} pages.")
+        logging.info(f"Successfully scraped {scraped_count}/{len(links_to_scrape)} pages ({suppressed_count} near-duplicates suppressed).")
     
+    except KeyboardInterrupt:
+        if outputs_opened:
+            logging.warning("Scraping interrupted; pages scraped so far were saved.")
+        else:
+            logging.warning("Scraping interrupted before any page was scraped.")
     except Exception as e:
         logging.critical(f"An unexpected error occurred: {e}", exc_info=True)
     finally:
-        if driver:
-            driver.quit()
-            logging.info("Browser closed.")
+        _SESSION.close() # Release the pooled keep-alive connections
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
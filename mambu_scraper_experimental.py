@@ -8,19 +8,23 @@ import ssl
 import json
 import sys
 import certifi
-import urllib.request
 import re
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
 
 import html2text
+import orjson
 import PyPDF2
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.common.exceptions import (
+    ElementClickInterceptedException,
     JavascriptException,
     NoSuchElementException,
+    StaleElementReferenceException,
     TimeoutException,
 )
 from selenium.webdriver.chrome.options import Options
@@ -142,10 +146,12 @@ def setup_driver():
     return driver
 
 # --- Text Cleaning Function ---
+_WS_RE = re.compile(r'\s+')
+
 def clean_text(text):
     if not text:
         return ""
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     return text.strip()
 
 # --- get_chromedriver_path (Fallback, likely unused if ChromeDriverManager works) ---
@@ -192,67 +198,94 @@ def get_chromedriver_path():
     return chromedriver_path
 
 # --- Overlay Handling Function ---
+# Overlay buttons, accept before dismiss
+OVERLAY_ACCEPT_SELECTORS = [
+    "//button[normalize-space(.)='OK']", 
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'allow')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'confirm')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'got it')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'okay')]",
+    "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
+    "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]",
+    "[id*='cookie'] button[class*='accept']",
+    "[id*='consent'] button[class*='accept']",
+    "[aria-label*='consent'] button",
+    "button#hs-eu-confirmation-button", 
+    "button#onetrust-accept-btn-handler",
+]
+OVERLAY_DISMISS_SELECTORS = [
+    "//button[contains(@aria-label, 'Dismiss')]",
+    "//button[contains(@aria-label, 'Close')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'dismiss')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'close')]",
+    "//span[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'close')]",
+    "[aria-label*='close']",
+]
+OVERLAY_SELECTORS = OVERLAY_ACCEPT_SELECTORS + OVERLAY_DISMISS_SELECTORS
+
+# Returns the first visible, enabled element matching the given XPath or CSS selectors, trying
+# them in list order so a specific banner button beats a generic link earlier in the page;
+# one round trip per poll instead of a lookup per selector
+FIND_FIRST_OVERLAY_SCRIPT = """
+for (const sel of arguments[0]) {
+    let matches;
+    try {
+        if (sel.startsWith('//')) {
+            const snapshot = document.evaluate(sel, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            matches = Array.from({length: snapshot.snapshotLength}, (_, i) => snapshot.snapshotItem(i));
+        } else {
+            matches = document.querySelectorAll(sel);
+        }
+    } catch (e) {
+        continue;
+    }
+    for (const el of matches) {
+        if (!el.disabled && el.getClientRects().length) {
+            return el;
+        }
+    }
+}
+return null;
+"""
+
+def find_overlay_button(driver):
+    """Return the first displayed and enabled overlay button in selector priority order, accept buttons first, or False."""
+    return driver.execute_script(FIND_FIRST_OVERLAY_SCRIPT, OVERLAY_SELECTORS) or False
+
 def handle_overlays(driver, timeout=10): 
-    accept_selectors = [
-        "//button[normalize-space(.)='OK']", 
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'allow')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'confirm')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'got it')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'okay')]",
-        "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
-        "//a[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]",
-        "[id*='cookie'] button[class*='accept']",
-        "[id*='consent'] button[class*='accept']",
-        "[aria-label*='consent'] button",
-        "button#hs-eu-confirmation-button", 
-        "button#onetrust-accept-btn-handler",
-    ]
-    dismiss_selectors = [
-        "//button[contains(@aria-label, 'Dismiss')]",
-        "//button[contains(@aria-label, 'Close')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'dismiss')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'close')]",
-        "//span[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'close')]",
-        "[aria-label*='close']",
-    ]
     logging.debug("Attempting to handle overlays...")
-    for selectors_group in [accept_selectors, dismiss_selectors]:
-        for selector in selectors_group:
-            try:
-                wait = WebDriverWait(driver, timeout)
-                element_present_condition = EC.presence_of_element_located(
-                    (By.XPATH, selector) if selector.startswith("//") else (By.CSS_SELECTOR, selector)
-                )
-                element = wait.until(element_present_condition)
-                
-                if element.is_displayed() and element.is_enabled():
-                    logging.info(f"Found potential overlay button: {selector}. Attempting to click.")
-                    try:
-                        element.click()
-                        logging.info("Clicked overlay button.")
-                        time.sleep(1.5) 
-                        return True 
-                    except ElementClickInterceptedException:
-                        logging.warning(f"Click intercepted for {selector}. Trying JavaScript click.")
-                        try:
-                            driver.execute_script("arguments[0].click();", element)
-                            logging.info("Clicked overlay button using JavaScript.")
-                            time.sleep(1.5) 
-                            return True
-                        except Exception as js_ex:
-                            logging.error(f"JavaScript click failed for {selector}: {js_ex}")
-                    except StaleElementReferenceException:
-                        logging.warning(f"Element {selector} became stale. Overlay might have disappeared.")
-                        return True 
-                    except Exception as e_click:
-                        logging.error(f"Error clicking overlay button {selector}: {e_click}")
-            except TimeoutException:
-                logging.debug(f"Overlay selector not found or not ready: {selector}")
-            except Exception as e_find:
-                logging.error(f"Error finding/processing overlay selector {selector}: {e_find}")
-    logging.debug("No common overlay buttons found or handled.")
+    try:
+        # One script call per poll instead of a full wait per selector
+        element = WebDriverWait(driver, timeout, poll_frequency=0.2).until(find_overlay_button)
+    except TimeoutException:
+        logging.debug("No common overlay buttons found or handled.")
+        return False
+    except Exception as e_find:
+        logging.error(f"Error finding overlay buttons: {e_find}")
+        return False
+
+    logging.info("Found potential overlay button. Attempting to click.")
+    try:
+        element.click()
+        logging.info("Clicked overlay button.")
+        time.sleep(1.5) 
+        return True 
+    except ElementClickInterceptedException:
+        logging.warning("Click intercepted. Trying JavaScript click.")
+        try:
+            driver.execute_script("arguments[0].click();", element)
+            logging.info("Clicked overlay button using JavaScript.")
+            time.sleep(1.5) 
+            return True
+        except Exception as js_ex:
+            logging.error(f"JavaScript click failed: {js_ex}")
+    except StaleElementReferenceException:
+        logging.warning("Overlay button became stale. Overlay might have disappeared.")
+        return True 
+    except Exception as e_click:
+        logging.error(f"Error clicking overlay button: {e_click}")
     return False
 
 # --- Dynamic Scrolling Function (used by extract_page_content) ---
@@ -294,11 +327,13 @@ def scroll_to_bottom_and_wait(driver, scroll_pause_time=3, max_scroll_attempts=2
     return
 
 # --- HTML Page Content Extraction Function ---
-def extract_page_content(driver, url):
+def extract_page_content(driver, url, navigate=True):
     try:
-        logging.info(f"HTML SCRAPE: Navigating to {url}")
-        driver.set_page_load_timeout(60) 
-        driver.get(url)
+        # With navigate=False a page the driver already shows is scraped as is
+        if navigate or driver.current_url != url:
+            logging.info(f"HTML SCRAPE: Navigating to {url}")
+            driver.set_page_load_timeout(60) 
+            driver.get(url)
         
         WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.TAG_NAME, "title")))
         title = driver.title
@@ -425,6 +460,9 @@ def get_fallback_doc_links():
         "https://support.mambu.com/docs/creating-deposit-accounts"
     ]
 
+# Returns the resolved href of every <a> under arguments[0] (or the whole document)
+COLLECT_HREFS_SCRIPT = "return Array.from((arguments[0] || document).querySelectorAll('a'), a => a.href);"
+
 # --- Modified Link Discovery Function to use reduced timeouts and be more aggressive ---
 def get_all_doc_links(driver, start_url, timeout=30):  # Increased from 15 to handle slower websites
     """Discovers documentation links with reduced timeout and more aggressive fallbacks."""
@@ -450,7 +488,7 @@ def get_all_doc_links(driver, start_url, timeout=30):  # Increased from 15 to ha
         logging.info(f"[GET_LINKS] Page title: {driver.title}")
         logging.info(f"[GET_LINKS] Current URL after load: {driver.current_url}")
 
-        doc_links = set()
+        doc_links = {} # Ordered set, so the link list is stable from run to run
         processed_links_cache = set()
 
         try:
@@ -461,18 +499,18 @@ def get_all_doc_links(driver, start_url, timeout=30):  # Increased from 15 to ha
             )
             logging.info(f"[GET_LINKS] Link container 'categories' is present. Now extracting links...")
             
-            links_in_container = link_container_present.find_elements(By.TAG_NAME, "a")
+            # Read every href in one script call instead of one get_attribute round-trip per link
+            hrefs_in_container = driver.execute_script(COLLECT_HREFS_SCRIPT, link_container_present)
             
-            if not links_in_container:
+            if not hrefs_in_container:
                 logging.warning(f"[GET_LINKS] No <a> tags found within 'categories' container")
             else:
-                for link in links_in_container:
-                    href = link.get_attribute("href")
+                for href in hrefs_in_container:
                     if href and href not in processed_links_cache:
                         processed_links_cache.add(href)
                         if href.startswith(start_url) and href != start_url and "/docs/" in href:
                             logging.info(f"[GET_LINKS] Found valid doc link in 'categories': {href}")
-                            doc_links.add(href)
+                            doc_links[href] = None
         except TimeoutException:
             logging.warning(f"[GET_LINKS] Timeout waiting for link container - trying fallback approach")
         except Exception as e:
@@ -482,25 +520,24 @@ def get_all_doc_links(driver, start_url, timeout=30):  # Increased from 15 to ha
         if not doc_links:
             logging.info("[GET_LINKS] Attempting fallback: searching all <a> tags on page")
             try:
-                all_links_on_page = driver.find_elements(By.TAG_NAME, "a")
-                logging.info(f"[GET_LINKS] Fallback: Found {len(all_links_on_page)} <a> tags. Filtering them...")
+                all_hrefs_on_page = driver.execute_script(COLLECT_HREFS_SCRIPT, None)
+                logging.info(f"[GET_LINKS] Fallback: Found {len(all_hrefs_on_page)} <a> tags. Filtering them...")
                 
-                for link in all_links_on_page:
-                    href = link.get_attribute("href")
+                for href in all_hrefs_on_page:
                     if href and href not in processed_links_cache and "/docs/" in href and "mambu.com" in href:
                         logging.info(f"[GET_LINKS] Fallback: Found potential doc link: {href}")
-                        doc_links.add(href)
+                        doc_links[href] = None
             except Exception as e_fallback:
                 logging.error(f"[GET_LINKS] Error during fallback link search: {e_fallback}")
         
         # Final processing: normalize URLs
-        final_doc_links = set()
+        final_doc_links = {} # Ordered set: dedupes in one pass and keeps discovery order
         for link_url in doc_links:
             abs_link = urljoin(start_url, link_url)
             if "support.mambu.com/docs" in abs_link:
                 parsed_abs_link = urlparse(abs_link)
                 normalized_link = parsed_abs_link._replace(query="", fragment="").geturl()
-                final_doc_links.add(normalized_link)
+                final_doc_links[normalized_link] = None
                 
         logging.info(f"[GET_LINKS] Found {len(final_doc_links)} unique doc links")
         
@@ -576,71 +613,95 @@ def download_and_extract_pdf_content(driver, page_url, title, pdf_download_dir):
         logging.error(f"CDP PDF: Failed to download/extract PDF for {page_url}: {e}", exc_info=True)
         return None
 
+# --- Extraction strategies ---
+# Tried in order on a page the driver has already loaded; the first that yields content wins.
+# Each takes (driver, page_url, title, pdf_download_dir)
+def extract_via_pdf(driver, page_url, title, pdf_download_dir):
+    return download_and_extract_pdf_content(driver, page_url, title, pdf_download_dir)
+
+def extract_via_html(driver, page_url, title, pdf_download_dir):
+    # The page is already loaded for the PDF export, so it is not navigated to a second time
+    return extract_page_content(driver, page_url, navigate=False)
+
+STRATEGIES = [("PDF", extract_via_pdf), ("HTML", extract_via_html)]
+
 # --- download_page_direct (Fallback for sitemap/robots.txt, not primary content) ---
+# One pooled keep-alive session, so repeated sitemap/robots fetches reuse the TLS connection
+_HTTP = requests.Session()
+# Use a more specific User-Agent, similar to what Selenium uses
+_HTTP.headers.update({
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36'
+})
+_HTTP.verify = certifi.where()
+_HTTP.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                                    max_retries=Retry(total=3, backoff_factor=0.3,
+                                                      status_forcelist=[429, 500, 502, 503, 504])))
+
 def download_page_direct(url):
     try:
         logging.info(f"Attempting direct download of: {url}")
-        # Use a more specific User-Agent, similar to what Selenium uses
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36'
-        }
-        context = ssl.create_default_context(cafile=certifi.where())
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, context=context, timeout=30) as response:
-            if response.status == 200:
-                content_type = response.headers.get('Content-Type', '').lower()
-                charset = response.headers.get_content_charset() or 'utf-8'
-                logging.info(f"Successfully downloaded {url} (Content-Type: {content_type}, Charset: {charset})")
-                
-                if 'text/plain' in content_type or 'text/xml' in content_type or 'application/xml' in content_type:
-                    return response.read().decode(charset)
-                elif 'application/json' in content_type:
-                     return response.read().decode(charset) 
-                else:
-                    logging.warning(f"Downloaded {url} but content type '{content_type}' is not text/xml/json. Attempting decode.")
-                    try:
-                        return response.read().decode(charset) 
-                    except UnicodeDecodeError:
-                        logging.error(f"Could not decode content from {url} with charset {charset}.")
-                        return None 
+        response = _HTTP.get(url, timeout=30)
+        if response.status_code == 200:
+            content_type = response.headers.get('Content-Type', '').lower()
+            # Decode as UTF-8 unless the server names a charset
+            charset = response.encoding if 'charset=' in content_type else 'utf-8'
+            logging.info(f"Successfully downloaded {url} (Content-Type: {content_type}, Charset: {charset})")
+            
+            if 'text/plain' in content_type or 'text/xml' in content_type or 'application/xml' in content_type:
+                return response.content.decode(charset)
+            elif 'application/json' in content_type:
+                 return response.content.decode(charset) 
             else:
-                logging.error(f"Failed to download {url}. Status code: {response.status}")
-                return None
+                logging.warning(f"Downloaded {url} but content type '{content_type}' is not text/xml/json. Attempting decode.")
+                try:
+                    return response.content.decode(charset) 
+                except UnicodeDecodeError:
+                    logging.error(f"Could not decode content from {url} with charset {charset}.")
+                    return None 
+        else:
+            logging.error(f"Failed to download {url}. Status code: {response.status_code}")
+            return None
     except Exception as e:
         logging.error(f"Error during direct download of {url}: {e}")
         return None
 
 # --- Saving Functions ---
+# Output files are written with a 1 MiB buffer rather than the 8 KiB default
+OUTPUT_BUFFER_SIZE = 1 << 20
+
 def save_as_json(data, filename):
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        # orjson encodes straight to UTF-8 bytes in one write; it only indents by 2 spaces
+        with open(filename, 'wb', buffering=OUTPUT_BUFFER_SIZE) as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         logging.info(f"JSON data saved to: {filename}")
     except Exception as e:
         logging.error(f"Failed to save data to JSON file {filename}: {e}")
 
-def save_as_markdown(data, filename, total_links_found):
+def _page_section(i, page_data):
+    """Markdown block for one scraped page."""
+    url = page_data.get('url', 'N/A')
+    return (f"## {i}. {page_data.get('title', 'Untitled Page')}\n\n"
+            f"**URL:** [{url}]({url})  \n"
+            f"**Source Type:** {page_data.get('source_type', 'N/A')}  \n\n"
+            f"{page_data.get('content', 'No content available.')}\n\n---\n\n")
+
+def save_as_markdown(data, filename, total_links_found, scraped_on=None):
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
+        with open(filename, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as f:
             if not data:
                 f.write("# Mambu Documentation Scrape\n\nNo content was scraped.\n")
                 logging.info("Markdown file saved (no content).")
                 return
 
-            f.write(f"# Mambu Documentation Scrape - Combined ({len(data)} pages processed)\n\n")
-            f.write(f"Scraped on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-            for i, page_data in enumerate(data):
-                title = page_data.get('title', 'Untitled Page')
-                url = page_data.get('url', 'N/A')
-                content = page_data.get('content', 'No content available.')
-                source_type = page_data.get('source_type', 'N/A')
-
-                f.write(f"## {i+1}. {title}\n\n")
-                f.write(f"**URL:** [{url}]({url})  \n")
-                f.write(f"**Source Type:** {source_type}  \n\n")
-                f.write(content)
-                f.write("\n\n---\n\n")
+            # Collect every fragment and write the document in one call
+            parts = [
+                f"# Mambu Documentation Scrape - Combined ({len(data)} pages processed)\n\n",
+                f"Scraped on: {(scraped_on or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+            ]
+            # One block per page rather than five appends each
+            parts.extend(_page_section(i, page_data) for i, page_data in enumerate(data, 1))
+            f.write("".join(parts))
             logging.info(f"Markdown data saved to: {filename}")
     except Exception as e:
         logging.error(f"Failed to save data to Markdown file {filename}: {e}")
@@ -766,6 +827,9 @@ def main(args):
         logging.info(f"Log Level: {args.log_level}")
 
     start_time = time.time()
+    # One timestamp for the whole run, so the JSON, Markdown and fallback filenames all agree
+    run_started = datetime.now()
+    timestamp = run_started.strftime("%Y%m%d_%H%M%S")
     if perform_scrape: # Only initialize these if actually scraping
         all_scraped_content = []
         doc_links = [] 
@@ -788,13 +852,12 @@ def main(args):
                 logging.info(f"Successfully retrieved {len(doc_links)} links")
             else:
                 logging.warning("No documentation links found through any method. Exiting after link discovery.")
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 json_filename_to_save = os.path.join(args.output_dir, f"mambu_documentation_{timestamp}_nolinks.json")
                 md_filename_to_upload = os.path.join(args.output_dir, f"mambu_documentation_{timestamp}_nolinks.md")
                 if not os.path.exists(args.output_dir):
                     os.makedirs(args.output_dir)
                 save_as_json([], json_filename_to_save)
-                save_as_markdown([], md_filename_to_upload, 0)
+                save_as_markdown([], md_filename_to_upload, 0, run_started)
                 return
             
             # Process links - limit to max_pages if specified
@@ -841,25 +904,21 @@ def main(args):
                     else: 
                          page_title_for_pdf = driver.title if driver.title else page_title_for_pdf
 
-                    # Try PDF download
-                    pdf_content_data = download_and_extract_pdf_content(driver, page_url, page_title_for_pdf, pdf_download_dir)
-                    
-                    if pdf_content_data and pdf_content_data.get("content"):
-                        logging.info(f"Successfully extracted content via PDF for: {page_url}")
-                        all_scraped_content.append(pdf_content_data)
+                    # Try each extraction strategy in turn, stopping at the first with content
+                    for strategy_name, strategy in STRATEGIES:
+                        content_data = strategy(driver, page_url, page_title_for_pdf, pdf_download_dir)
+                        if content_data and content_data.get("content"):
+                            logging.info(f"Successfully extracted content via {strategy_name} for: {page_url}")
+                            all_scraped_content.append(content_data)
+                            break
+                        logging.warning(f"{strategy_name} extraction failed for {page_url}.")
                     else:
-                        logging.warning(f"PDF extraction failed for {page_url}. Falling back to HTML.")
-                        html_content_data = extract_page_content(driver, page_url) 
-                        if html_content_data and html_content_data.get("content"): 
-                            all_scraped_content.append(html_content_data)
-                        else:
-                            logging.warning(f"HTML extraction also failed for {page_url}.")
-                            all_scraped_content.append({
-                                "title": f"Failed to scrape: {page_url}",
-                                "url": page_url,
-                                "content": "Error: Could not retrieve content.",
-                                "source_type": "extraction_failed"
-                            })
+                        all_scraped_content.append({
+                            "title": f"Failed to scrape: {page_url}",
+                            "url": page_url,
+                            "content": "Error: Could not retrieve content.",
+                            "source_type": "extraction_failed"
+                        })
                     
                     # Check if page processing took too long
                     if time.time() - page_processing_start > MAX_PAGE_PROCESSING_TIME:
@@ -882,7 +941,6 @@ def main(args):
                     break
                 
             # After loop, define md_filename and json_filename for saving
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             if not os.path.exists(args.output_dir):
                 os.makedirs(args.output_dir)
                 logging.info(f"Created output directory: {args.output_dir}")
@@ -944,7 +1002,6 @@ def main(args):
                  # md_filename_to_upload = None # Reset if not valid
 
         if not md_filename_to_upload: 
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             status_suffix = "_cleanup_save"
             if scraping_status.get("status") == "failed" : status_suffix = "_error_save"
             if scraping_status.get("status") == "interrupted": status_suffix = "_interrupted_save"
@@ -962,7 +1019,7 @@ def main(args):
         current_num_links = num_links_intended if 'num_links_intended' in locals() else 0
 
         save_as_json(current_scraped_content, json_filename_to_save)
-        save_as_markdown(current_scraped_content, md_filename_to_upload, current_num_links)
+        save_as_markdown(current_scraped_content, md_filename_to_upload, current_num_links, run_started)
         
         # --- Google Drive Upload --- (Also attempt this in finally if md_filename_to_upload is valid)
         if md_filename_to_upload and os.path.exists(md_filename_to_upload) and args.target_folder_id:
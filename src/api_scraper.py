@@ -1,28 +1,20 @@
-import os
 import time
 import logging
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-import json
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from bs4 import BeautifulSoup, SoupStrainer
+import orjson
+import sqlite3
 import requests
 from urllib.parse import urljoin
 import concurrent.futures
-from functools import partial
+from collections import deque
 from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from urllib3.util.retry import Retry
 import threading
-from queue import Queue
 import hashlib
 from tqdm import tqdm
-import pickle
-import zlib
+import zstandard
 from pathlib import Path
 
 # Set up logging
@@ -38,96 +30,164 @@ logging.basicConfig(
 class RateLimiter:
     def __init__(self, calls_per_second=2):
         self.calls_per_second = calls_per_second
-        self.last_call_time = 0
+        self.interval = 1.0 / calls_per_second
+        self.next_slot = 0
         self.lock = threading.Lock()
 
     def wait(self):
+        # Reserve the next free slot under the lock, then sleep outside it so other
+        # workers can reserve their own slots instead of queueing behind this sleep
         with self.lock:
-            current_time = time.time()
-            time_since_last_call = current_time - self.last_call_time
-            if time_since_last_call < (1.0 / self.calls_per_second):
-                time.sleep((1.0 / self.calls_per_second) - time_since_last_call)
-            self.last_call_time = time.time()
+            current_time = time.monotonic()
+            slot = max(current_time, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > current_time:
+            time.sleep(slot - current_time)
+
+    def pause(self, seconds):
+        """Hold back every caller for at least `seconds` (e.g. when the server asks us to slow down)"""
+        with self.lock:
+            self.next_slot = max(self.next_slot, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers):
+        """Back off according to Retry-After / X-RateLimit-* response headers, if present"""
+        retry_after = headers.get('Retry-After')
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                # HTTP-date form
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = 0
+            if delay > 0:
+                logging.warning(f"Server requested Retry-After {delay:.1f}s; pausing requests")
+                self.pause(delay)
+            return
+        
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining is not None and reset is not None:
+            try:
+                if int(float(remaining)) > 0:
+                    return
+                reset = float(reset)
+            except ValueError:
+                return
+            # The reset is either seconds to wait or an epoch timestamp
+            delay = reset - time.time() if reset > 1e9 else reset
+            if delay > 0:
+                logging.warning(f"Rate limit exhausted; pausing requests for {delay:.1f}s")
+                self.pause(delay)
+
+# h3 labels of the endpoint subsections read by extract_endpoint_info
+SUBSECTION_LABELS = ('Parameters', 'Request Body', 'Response')
+
+# Only the main content block is ever read, so skip building the rest of the tree
+CONTENT_STRAINER = SoupStrainer('div', class_='content')
 
 class MambuAPIDocScraper:
-    def __init__(self, max_workers=4, batch_size=10, calls_per_second=2):
+    def __init__(self, max_workers=4, calls_per_second=2):
         self.base_url = "https://api.mambu.com/v2"
         self.docs_url = "https://api.mambu.com/v2/docs"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.visited_urls = set()
-        self.api_docs = []
+        self.api_docs = [] # Raw per-page endpoint info; deduplicated once when saving
+        self.state_lock = threading.Lock() # Guards visited_urls and api_docs across worker threads
         self.max_workers = max_workers
-        self.batch_size = batch_size
         self.cache_dir = Path('cache')
+        self._cache_keys = {}
         self.rate_limiter = RateLimiter(calls_per_second)
         self._setup_cache()
         self._setup_session()
         self.progress_bar = None
 
     def _setup_cache(self):
-        """Set up the cache directory"""
+        """Set up the cache directory and the single SQLite store inside it"""
         self.cache_dir.mkdir(exist_ok=True)
+        # One WAL-mode database instead of a file per URL; the connection is shared by the
+        # worker threads, so every statement runs under cache_lock
+        self.cache_lock = threading.Lock()
+        self.cache_db = sqlite3.connect(self.cache_dir / 'cache.sqlite', check_same_thread=False)
+        self.cache_db.execute('PRAGMA journal_mode=WAL')
+        self.cache_db.execute('CREATE TABLE IF NOT EXISTS pages (cache_key TEXT PRIMARY KEY, body BLOB)')
+        self.cache_db.commit()
 
     def _setup_session(self):
-        """Set up a session with retry strategy"""
-        session = requests.Session()
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=10, pool_maxsize=10)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        session.headers.update(self.headers)
-        self.session = session
+        """Set up thread-local storage for per-worker sessions"""
+        # requests.Session is not documented as thread-safe, so each worker thread
+        # lazily gets its own session (and connection pool) via _get_session
+        self._thread_local = threading.local()
+
+    def _get_session(self):
+        """Get the calling thread's session with retry strategy, creating it on first use"""
+        session = getattr(self._thread_local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            retry_strategy = Retry(
+                total=3,
+                backoff_factor=1,
+                status_forcelist=[429, 500, 502, 503, 504],
+                # Hand back the last response once retries run out so its rate-limit headers can be read
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=10, pool_maxsize=10)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(self.headers)
+            self._thread_local.session = session
+        return session
 
     def _get_cache_key(self, url):
         """Generate a cache key for a URL"""
-        return hashlib.md5(url.encode()).hexdigest()
+        # Each URL is looked up on read and again on write, so remember its key
+        cache_key = self._cache_keys.get(url)
+        if cache_key is None:
+            cache_key = hashlib.blake2b(url.encode('utf-8'), digest_size=16).hexdigest()
+            self._cache_keys[url] = cache_key
+        return cache_key
 
     def _get_cached_content(self, url):
         """Get content from cache if available"""
         cache_key = self._get_cache_key(url)
-        cache_file = self.cache_dir / f"{cache_key}.pkl"
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'rb') as f:
-                    compressed_data = f.read()
-                    decompressed_data = zlib.decompress(compressed_data)
-                    return pickle.loads(decompressed_data)
-            except:
-                return None
+        try:
+            with self.cache_lock:
+                row = self.cache_db.execute('SELECT body FROM pages WHERE cache_key = ?', (cache_key,)).fetchone()
+            if row:
+                return zstandard.ZstdDecompressor().decompress(row[0]).decode('utf-8')
+        except:
+            return None
         return None
 
     def _cache_content(self, url, content):
-        """Cache content for a URL using compression"""
+        """Cache content for a URL as zstd-compressed UTF-8 text"""
         cache_key = self._get_cache_key(url)
-        cache_file = self.cache_dir / f"{cache_key}.pkl"
         try:
-            serialized_data = pickle.dumps(content)
-            compressed_data = zlib.compress(serialized_data)
-            with open(cache_file, 'wb') as f:
-                f.write(compressed_data)
+            compressed_data = zstandard.ZstdCompressor(level=3).compress(content.encode('utf-8'))
+            with self.cache_lock:
+                self.cache_db.execute('INSERT OR REPLACE INTO pages (cache_key, body) VALUES (?, ?)', (cache_key, compressed_data))
+                self.cache_db.commit()
         except:
             pass
 
     def get_soup(self, url):
-        """Get BeautifulSoup object for a URL with caching and rate limiting"""
+        """Get BeautifulSoup object (content block only) for a URL with caching and rate limiting"""
         # Check cache first
         cached_content = self._get_cached_content(url)
         if cached_content:
-            return BeautifulSoup(cached_content, 'html.parser')
+            return BeautifulSoup(cached_content, 'lxml', parse_only=CONTENT_STRAINER)
 
         # Apply rate limiting
         self.rate_limiter.wait()
 
         try:
-            response = self.session.get(url, timeout=10)
+            response = self._get_session().get(url, timeout=10)
+            self.rate_limiter.update_from_headers(response.headers)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(response.text, 'lxml', parse_only=CONTENT_STRAINER)
             # Cache the content
             self._cache_content(url, response.text)
             return soup
@@ -157,9 +217,19 @@ class MambuAPIDocScraper:
             if desc_elem:
                 description = desc_elem.get_text().strip()
             
+            # Find the Parameters / Request Body / Response headings in one pass over the h3s
+            subsection_headings = {}
+            for heading in endpoint_section.find_all('h3'):
+                heading_text = heading.string
+                if not heading_text:
+                    continue
+                for label in SUBSECTION_LABELS:
+                    if label in heading_text:
+                        subsection_headings.setdefault(label, heading)
+            
             # Get parameters
             parameters = []
-            params_section = endpoint_section.find('h3', string=lambda x: x and 'Parameters' in x)
+            params_section = subsection_headings.get('Parameters')
             if params_section:
                 params_table = params_section.find_next('table')
                 if params_table:
@@ -175,7 +245,7 @@ class MambuAPIDocScraper:
             
             # Get request body
             request_body = None
-            body_section = endpoint_section.find('h3', string=lambda x: x and 'Request Body' in x)
+            body_section = subsection_headings.get('Request Body')
             if body_section:
                 body_content = body_section.find_next('pre')
                 if body_content:
@@ -183,7 +253,7 @@ class MambuAPIDocScraper:
             
             # Get response
             response = None
-            response_section = endpoint_section.find('h3', string=lambda x: x and 'Response' in x)
+            response_section = subsection_headings.get('Response')
             if response_section:
                 response_content = response_section.find_next('pre')
                 if response_content:
@@ -201,12 +271,30 @@ class MambuAPIDocScraper:
             logging.error(f"Error extracting endpoint info: {str(e)}")
             return None
 
+    def _endpoint_key(self, endpoint_info):
+        """Canonical dedupe key for an endpoint: upper-cased method plus normalized path"""
+        method = endpoint_info.get('method')
+        path = endpoint_info.get('path')
+        if not method or not path:
+            # Nothing to canonicalize; fall back to the page the info came from
+            return ('', endpoint_info['url'])
+        path = path.split('?', 1)[0].strip().rstrip('/') or '/'
+        return (method.strip().upper(), path)
+
+    def _unique_endpoints(self):
+        """Deduplicate the collected endpoints by canonical key, keeping the first page seen"""
+        endpoints_by_key = {}
+        for endpoint_info in self.api_docs:
+            endpoints_by_key.setdefault(self._endpoint_key(endpoint_info), endpoint_info)
+        return list(endpoints_by_key.values())
+
     def scrape_endpoint(self, url):
         """Scrape a single endpoint page"""
-        if url in self.visited_urls:
-            return
-        
-        self.visited_urls.add(url)
+        # Check-and-add under the lock so two workers never scrape the same URL
+        with self.state_lock:
+            if url in self.visited_urls:
+                return
+            self.visited_urls.add(url)
         if self.progress_bar:
             self.progress_bar.update(1)
         
@@ -223,11 +311,12 @@ class MambuAPIDocScraper:
         endpoint_info = self.extract_endpoint_info(content)
         if endpoint_info:
             endpoint_info['url'] = url
-            self.api_docs.append(endpoint_info)
+            with self.state_lock:
+                self.api_docs.append(endpoint_info)
         
         # Find and follow links to other endpoints
         links = []
-        for link in content.find_all('a', href=True):
+        for link in content.select('a[href]'):
             href = link['href']
             if href.startswith('/v2/'):
                 next_url = urljoin(self.base_url, href)
@@ -236,43 +325,39 @@ class MambuAPIDocScraper:
         
         return links
 
-    def process_batch(self, urls):
-        """Process a batch of URLs"""
-        new_links = []
-        for url in urls:
-            links = self.scrape_endpoint(url)
-            if links:
-                new_links.extend(links)
-        return new_links
+    def process_url(self, url):
+        """Scrape one URL and return the links found on it"""
+        return self.scrape_endpoint(url) or []
 
     def scrape_all(self):
         """Start scraping from the main documentation page with parallel processing"""
         logging.info("Starting to scrape Mambu API documentation...")
-        urls_to_process = [self.docs_url]
-        total_processed = 0
+        # FIFO frontier; each URL is enqueued at most once, so duplicates found on
+        # several pages never occupy a worker slot
+        urls_to_process = deque([self.docs_url])
+        queued_urls = {self.docs_url}
         
         # Initialize progress bar
         self.progress_bar = tqdm(total=1000, desc="Scraping endpoints", unit="endpoint")
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            while urls_to_process:
-                # Process URLs in batches
-                current_batch = urls_to_process[:self.batch_size]
-                urls_to_process = urls_to_process[self.batch_size:]
+            # Keep every worker busy: submit a new URL as soon as any in-flight one finishes,
+            # instead of waiting for a whole batch to drain before starting the next.
+            future_to_url = {}
+            while urls_to_process or future_to_url:
+                while urls_to_process and len(future_to_url) < self.max_workers:
+                    url = urls_to_process.popleft()
+                    future_to_url[executor.submit(self.process_url, url)] = url
                 
-                # Submit batch for processing
-                future_to_url = {
-                    executor.submit(self.process_batch, [url]): url 
-                    for url in current_batch
-                }
-                
-                # Process completed batches
-                for future in concurrent.futures.as_completed(future_to_url):
-                    url = future_to_url[future]
+                done, _ = concurrent.futures.wait(future_to_url, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    url = future_to_url.pop(future)
                     try:
                         new_links = future.result()
-                        if new_links:
-                            urls_to_process.extend(new_links)
+                        for link in new_links or ():
+                            if link not in queued_urls:
+                                queued_urls.add(link)
+                                urls_to_process.append(link)
                     except Exception as e:
                         logging.error(f"Error processing {url}: {str(e)}")
         
@@ -280,20 +365,24 @@ class MambuAPIDocScraper:
         if self.progress_bar:
             self.progress_bar.close()
         
+        # Deduplicate after the crawl so workers don't canonicalize keys while holding the lock
+        self.api_docs = self._unique_endpoints()
+        
         # Save the results
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         output_file = f'mambu_api_documentation_{timestamp}.json'
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.api_docs, f, indent=2, ensure_ascii=False)
+        # orjson serializes straight to UTF-8 bytes, skipping the intermediate str
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(self.api_docs, option=orjson.OPT_INDENT_2))
         
         logging.info(f"\nScraping completed. Found {len(self.api_docs)} endpoints.")
         logging.info(f"Results saved to {output_file}")
 
 def main():
     try:
-        # Create scraper with 4 workers, batch size of 10, and 2 calls per second
-        scraper = MambuAPIDocScraper(max_workers=4, batch_size=10, calls_per_second=2)
+        # Create scraper with 4 workers (also the number of URLs in flight) and 2 calls per second
+        scraper = MambuAPIDocScraper(max_workers=4, calls_per_second=2)
         scraper.scrape_all()
     except Exception as e:
         logging.error(f"An error occurred: {str(e)}")
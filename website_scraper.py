@@ -21,6 +21,8 @@ import ssl
 import zipfile
 import io
 import codecs
+import itertools
+import shutil
 import subprocess
 from datetime import datetime, timedelta
 import threading
@@ -55,13 +57,24 @@ except ImportError:
 
 # --- Global Variables ---
 app = Flask(__name__) if 'Flask' in sys.modules else None
-current_driver_instance = None
+# Drivers of the scrapes currently running (several when API versions are scraped concurrently),
+# so a shutdown signal can close them all
+active_drivers = set()
+_active_drivers_lock = threading.Lock()
+# ChromeDriverManager downloads and unzips into a shared cache; concurrent installs race on a cold cache
+_driver_install_lock = threading.Lock()
 scraping_status = {"status": "idle", "progress": 0, "total": 0, "last_update": None}
 scraping_thread = None
 
 # --- Version Information ---
 SCRAPER_VERSION = "1.0.0"
 USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36"
+# URL patterns the browser is told not to fetch (images, fonts, media)
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg"
+]
 
 # --- Utility Functions ---
 def setup_logging(log_level="INFO"):
@@ -82,8 +95,6 @@ def setup_logging(log_level="INFO"):
 
 def setup_driver():
     """Set up and configure a Selenium WebDriver instance for Chrome."""
-    global current_driver_instance
-    
     # Set up Chrome options
     chrome_options = Options()
     chrome_options.add_argument("--disable-infobars")
@@ -105,7 +116,8 @@ def setup_driver():
             logging.info("Setting up Selenium WebDriver with ChromeDriverManager for Docker execution...")
             # webdriver-manager will use the Chrome installed by the Dockerfile
             # and download the corresponding chromedriver to its cache.
-            driver_executable_path = ChromeDriverManager().install()
+            with _driver_install_lock:
+                driver_executable_path = ChromeDriverManager().install()
             logging.info(f"ChromeDriverManager().install() returned path in Docker: {driver_executable_path}")
             service = Service(executable_path=driver_executable_path)
         except Exception as e:
@@ -145,7 +157,8 @@ def setup_driver():
         try:
             logging.info("Setting up Selenium WebDriver with ChromeDriverManager for local execution...")
             
-            driver_path_from_manager = ChromeDriverManager().install()
+            with _driver_install_lock:
+                driver_path_from_manager = ChromeDriverManager().install()
             logging.info(f"ChromeDriverManager().install() initially returned path: {driver_path_from_manager}")
 
             # Determine the actual executable path
@@ -181,7 +194,8 @@ def setup_driver():
             
             # Try fallback to local chromedriver
             try:
-                local_driver_path = get_chromedriver_path()
+                with _driver_install_lock:
+                    local_driver_path = get_chromedriver_path()
                 logging.info(f"Attempting fallback to local ChromeDriver at: {local_driver_path}")
                 service = Service(executable_path=local_driver_path)
             except Exception as e2:
@@ -192,59 +206,81 @@ def setup_driver():
     try:
         driver = webdriver.Chrome(service=service, options=chrome_options)
         driver.set_page_load_timeout(30)
-        current_driver_instance = driver
+        block_unneeded_resources(driver)
+        with _active_drivers_lock:
+            active_drivers.add(driver)
         logging.info(f"Selenium User-Agent: {driver.execute_script('return navigator.userAgent;')}")
         return driver
     except Exception as e:
         logging.error(f"Failed to create WebDriver: {e}")
         raise
 
+def block_unneeded_resources(driver):
+    """Stop Chrome from downloading images, fonts and media, which never reach the extracted text."""
+    # Stylesheets stay enabled: the extractors rely on is_displayed(), which needs real layout
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCE_PATTERNS})
+        logging.info("Blocking image, font and media requests in the browser.")
+    except Exception as e:
+        logging.warning(f"Could not block resource loading via CDP: {e}")
+
 # --- Save Functions ---
-def save_as_json(data, filename):
-    """Save the scraped data as JSON."""
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    logging.info(f"JSON data saved to: {filename}")
-
-def save_as_markdown(data, filename, total_links_found):
-    """Save the scraped data as Markdown format."""
-    if not data:
-        logging.info("No content to save as Markdown.")
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write("# No content was scraped\n\n_This file is a placeholder_\n")
-        logging.info("Markdown file saved (no content).")
-        return
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(f"# Website Documentation\n\n")
-        f.write(f"_Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}_\n\n")
-        f.write(f"_Contains content from {len(data)}/{total_links_found} pages_\n\n")
-        
-        # Table of contents
-        f.write("## Table of Contents\n\n")
-        for index, item in enumerate(data):
-            title = item.get("title", f"Untitled Document {index+1}")
-            url = item.get("url", "")
-            clean_title = clean_title_for_link(title)
-            toc_line = f"- [{title}](#{index+1}-{clean_title})"
-            f.write(toc_line)
-            f.write("\n")
-        f.write("\n---\n\n")
-        
-        # Content sections
-        for index, item in enumerate(data):
-            title = item.get("title", f"Untitled Document {index+1}")
-            url = item.get("url", "")
-            content = item.get("content", "")
-            source_type = item.get("source_type", "unknown")
-            
-            f.write(f"## {index+1}. {title}\n\n")
-            f.write(f"**Source URL:** {url}\n\n")
-            f.write(f"**Source Type:** {source_type}\n\n")
-            f.write(f"{content}\n\n")
-            f.write("---\n\n")
-    
-    logging.info(f"Markdown data saved to: {filename}")
+def save_sections(sections, json_filename, md_filename):
+    """Stream sections to JSON and Markdown as they arrive; returns a title/source_type summary per section.
+
+    The JSON is written to a temp file and swapped in when complete, and the Markdown body is
+    staged in a .part file, so a section generator that fails partway leaves no partial output."""
+    summary = []
+    json_tmp_filename = json_filename + ".tmp"
+    md_body_filename = md_filename + ".part"
+    try:
+        with open(json_tmp_filename, 'w', encoding='utf-8') as json_file, \
+             open(md_body_filename, 'w', encoding='utf-8') as md_body:
+            json_file.write("[")
+            for index, item in enumerate(sections):
+                # Keep the same layout json.dump(indent=2) gives a list of objects
+                item_json = json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+                json_file.write(("," if index else "") + "\n  " + item_json)
+                
+                title = item.get("title", f"Untitled Document {index+1}")
+                source_type = item.get("source_type", "unknown")
+                md_body.write(f"## {index+1}. {title}\n\n")
+                md_body.write(f"**Source URL:** {item.get('url', '')}\n\n")
+                md_body.write(f"**Source Type:** {source_type}\n\n")
+                md_body.write(f"{item.get('content', '')}\n\n")
+                md_body.write("---\n\n")
+                summary.append({"title": title, "source_type": source_type})
+            json_file.write("\n]" if summary else "]")
+        os.replace(json_tmp_filename, json_filename)
+        logging.info(f"JSON data saved to: {json_filename}")
+        
+        # The table of contents needs every title, so the header is written last and the body appended
+        with open(md_filename, 'w', encoding='utf-8') as f:
+            if not summary:
+                logging.info("No content to save as Markdown.")
+                f.write("# No content was scraped\n\n_This file is a placeholder_\n")
+            else:
+                f.write(f"# Website Documentation\n\n")
+                f.write(f"_Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}_\n\n")
+                f.write(f"_Contains content from {len(summary)}/{len(summary)} pages_\n\n")
+                
+                # Table of contents
+                f.write("## Table of Contents\n\n")
+                for index, item in enumerate(summary):
+                    f.write(f"- [{item['title']}](#{index+1}-{clean_title_for_link(item['title'])})\n")
+                f.write("\n---\n\n")
+                
+                # Content sections
+                with open(md_body_filename, 'r', encoding='utf-8') as md_body:
+                    shutil.copyfileobj(md_body, f)
+        logging.info(f"Markdown data saved to: {md_filename}")
+    finally:
+        # Staging files never outlive the call, whether it completed or failed
+        for staging_filename in (json_tmp_filename, md_body_filename):
+            if os.path.exists(staging_filename):
+                os.remove(staging_filename)
+    return summary
     
 # --- Google Drive Functions ---
 def get_drive_service():
@@ -265,6 +301,11 @@ def get_drive_service():
         logging.error(f"Failed to authenticate with Google Drive API: {e}", exc_info=True)
         return None
 
+# Drive accepts at most 100 calls per batch request
+DRIVE_BATCH_LIMIT = 100
+# Resumable upload chunk size; must be a multiple of 256 KiB
+DRIVE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
 def find_and_archive_existing_files(service, target_folder_id, archive_folder_id, filename_prefix="website_documentation_"):
     """Finds files matching a prefix in the target folder and moves them to the archive folder."""
     if not service:
@@ -280,23 +321,31 @@ def find_and_archive_existing_files(service, target_folder_id, archive_folder_id
             logging.info(f"No existing files matching '{filename_prefix}*.md' found in Target Drive folder '{target_folder_id}'. No archiving needed.")
             return
 
-        for item in items:
-            file_id = item['id']
-            file_name = item['name']
+        files_by_id = {item['id']: item['name'] for item in items}
+        for file_id, file_name in files_by_id.items():
             logging.info(f"Found existing file '{file_name}' (ID: {file_id}) in Target Drive folder.")
-            
-            try:
-                # Move the file by changing its parent
-                logging.info(f"Attempting to move '{file_name}' to Archive Drive folder '{archive_folder_id}'...")
-                updated_file = service.files().update(
+
+        def on_moved(request_id, response, exception):
+            file_name = files_by_id.get(request_id, request_id)
+            if exception is not None:
+                logging.error(f"Error moving file '{file_name}' (ID: {request_id}): {exception}")
+            else:
+                logging.info(f"Successfully moved '{file_name}' (ID: {request_id}) to Archive Drive folder '{archive_folder_id}'. New parents: {response.get('parents')}")
+
+        # Move the files by changing their parents, batching the metadata updates
+        # so the whole archive step costs one HTTP roundtrip per DRIVE_BATCH_LIMIT files
+        logging.info(f"Attempting to move {len(items)} file(s) to Archive Drive folder '{archive_folder_id}'...")
+        file_ids = list(files_by_id)
+        for start in range(0, len(file_ids), DRIVE_BATCH_LIMIT):
+            batch = service.new_batch_http_request(callback=on_moved)
+            for file_id in file_ids[start:start + DRIVE_BATCH_LIMIT]:
+                batch.add(service.files().update(
                     fileId=file_id,
                     addParents=archive_folder_id,
                     removeParents=target_folder_id,
                     fields='id, parents'
-                ).execute()
-                logging.info(f"Successfully moved '{file_name}' (ID: {file_id}) to Archive Drive folder '{archive_folder_id}'. New parents: {updated_file.get('parents')}")
-            except Exception as move_error:
-                logging.error(f"Error moving file '{file_name}' (ID: {file_id}): {move_error}")
+                ), request_id=file_id)
+            batch.execute()
             
     except HttpError as error:
         logging.error(f"An HTTP error occurred while searching/archiving files in Google Drive: {error}", exc_info=True)
@@ -320,7 +369,8 @@ def upload_file_to_drive(service, local_file_path, target_folder_id):
         'name': file_name,
         'parents': [target_folder_id]
     }
-    media = MediaFileUpload(local_file_path, mimetype='text/markdown', resumable=True)
+    # Media uploads cannot be batched; send them as one resumable request with large chunks
+    media = MediaFileUpload(local_file_path, mimetype='text/markdown', chunksize=DRIVE_UPLOAD_CHUNK_SIZE, resumable=True)
     
     try:
         uploaded_file = service.files().create(
@@ -413,9 +463,11 @@ if __name__ == "__main__":
             global scraping_status
             logging.warning(f"Received signal {sig}, initiating graceful shutdown...")
             scraping_status["status"] = "interrupted"
-            if current_driver_instance:
+            with _active_drivers_lock:
+                drivers = list(active_drivers)
+            for driver in drivers:
                 try:
-                    current_driver_instance.quit()
+                    driver.quit()
                     logging.info("Browser instance closed due to signal.")
                 except:
                     pass
@@ -430,18 +482,21 @@ if __name__ == "__main__":
 # --- Main Script --- 
 
 # --- Content Extraction Functions ---
+# Compiled once; clean_text runs on every extracted section
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
+
 def clean_text(text):
     """Clean and normalize text content."""
     if not text:
         return ""
-    # Replace multiple newlines with a single newline
-    text = re.sub(r'\n\s*\n', '\n\n', text)
-    # Remove leading/trailing whitespace
-    return text.strip()
+    # Replace multiple newlines with a single blank line, then trim
+    return _BLANK_LINES_RE.sub('\n\n', text).strip()
+
+_LINK_UNSAFE_RE = re.compile(r'[^\w\-]')
 
 def clean_title_for_link(title):
     """Clean a title string for use in markdown links."""
-    return re.sub(r'[^\w\-]', '', title.lower().replace(' ', '-'))
+    return _LINK_UNSAFE_RE.sub('', title.lower().replace(' ', '-'))
 
 def handle_overlays(driver, timeout=10):
     """Attempt to close any overlays or popups that might block interaction."""
@@ -503,10 +558,9 @@ def scroll_to_bottom_and_wait(driver, scroll_pause_time=1, max_scroll_attempts=1
     return True
 
 def extract_sections_from_page(driver, url):
-    """Extract documentation sections from a single long-form page."""
+    """Extract documentation sections from a single long-form page, yielding them as they are read."""
     try:
         logging.info(f"Extracting content sections from {url}")
-        all_sections = []
         
         # Handle potential overlays
         handle_overlays(driver)
@@ -535,15 +589,12 @@ def extract_sections_from_page(driver, url):
                 ".left-menu"
             ]
             
+            # One lookup for all candidates (in document order) instead of one per selector
             nav_element = None
-            for selector in nav_selectors:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                for element in elements:
-                    if element.is_displayed() and element.text.strip():
-                        nav_element = element
-                        logging.info(f"Found navigation/TOC using selector: {selector}")
-                        break
-                if nav_element:
+            for element in driver.find_elements(By.CSS_SELECTOR, ", ".join(nav_selectors)):
+                if element.is_displayed() and element.text.strip():
+                    nav_element = element
+                    logging.info(f"Found navigation/TOC element: <{element.tag_name}>")
                     break
                     
             if nav_element:
@@ -582,40 +633,38 @@ def extract_sections_from_page(driver, url):
                         converter.body_width = 0  # No line wrapping
                         content_text = converter.handle(content_html)
                         
-                        all_sections.append({
+                        yield {
                             "title": section_title,
                             "url": url + "#" + section_title.lower().replace(" ", "-"),
                             "content": clean_text(content_text),
                             "source_type": "html_section"
-                        })
+                        }
                     except Exception as e:
                         logging.error(f"Error extracting section content: {e}")
-                        all_sections.append({
+                        yield {
                             "title": section_title,
                             "url": url,
                             "content": f"Error extracting content: {str(e)}",
                             "source_type": "extraction_failed"
-                        })
+                        }
             else:
                 # If no navigation is found, treat the entire page as one document
                 logging.info("No navigation found. Extracting entire page content.")
-                extract_full_page_content(driver, url, all_sections)
+                yield from extract_full_page_sections(driver, url)
         
         except Exception as e:
             logging.error(f"Error processing navigation: {e}")
             # Fallback to extracting the entire page
-            extract_full_page_content(driver, url, all_sections)
-            
-        return all_sections
+            yield from extract_full_page_sections(driver, url)
         
     except Exception as e:
         logging.error(f"Error extracting sections from page: {e}")
-        return [{
+        yield {
             "title": "Extraction Failed",
             "url": url,
             "content": f"Failed to extract content. Error: {str(e)}",
             "source_type": "extraction_failed"
-        }]
+        }
 
 def extract_full_page_content(driver, url, all_sections):
     """Extract the entire page as a single document when no navigation structure is found."""
@@ -629,19 +678,16 @@ def extract_full_page_content(driver, url, all_sections):
             "article", 
             ".content", 
             "#content", 
-            ".documentation",
-            "body"
+            ".documentation"
         ]
         
+        # One lookup for all candidates; <body> is only the fallback below, since
+        # it would always come first in document order
         content_element = None
-        for selector in content_selectors:
-            elements = driver.find_elements(By.CSS_SELECTOR, selector)
-            for element in elements:
-                if element.is_displayed() and element.text.strip():
-                    content_element = element
-                    logging.info(f"Found main content using selector: {selector}")
-                    break
-            if content_element:
+        for element in driver.find_elements(By.CSS_SELECTOR, ", ".join(content_selectors)):
+            if element.is_displayed() and element.text.strip():
+                content_element = element
+                logging.info(f"Found main content element: <{element.tag_name}>")
                 break
         
         if not content_element:
@@ -671,11 +717,16 @@ def extract_full_page_content(driver, url, all_sections):
             "source_type": "extraction_failed"
         })
 
+def extract_full_page_sections(driver, url):
+    """Yield the entire page as a single section."""
+    full_page_sections = []
+    extract_full_page_content(driver, url, full_page_sections)
+    yield from full_page_sections
+
 def extract_sections_with_headers(driver, url):
-    """Extract sections from the page based on header elements (h1, h2, etc.)."""
+    """Extract sections from the page based on header elements (h1, h2, etc.), yielding them as they are read."""
     try:
         logging.info("Extracting content by headers")
-        all_sections = []
         
         # Scroll and make sure all content is loaded
         scroll_to_bottom_and_wait(driver)
@@ -685,8 +736,8 @@ def extract_sections_with_headers(driver, url):
         
         if not headers:
             logging.warning("No headers found for section extraction. Falling back to full page extraction.")
-            extract_full_page_content(driver, url, all_sections)
-            return all_sections
+            yield from extract_full_page_sections(driver, url)
+            return
             
         logging.info(f"Found {len(headers)} potential section headers")
         
@@ -734,35 +785,42 @@ def extract_sections_with_headers(driver, url):
                 converter.body_width = 0  # No line wrapping
                 content_text = converter.handle(section_html)
                 
-                all_sections.append({
+                yield {
                     "title": header_text,
                     "url": url + "#" + header_text.lower().replace(" ", "-").replace(".", ""),
                     "content": clean_text(content_text),
                     "source_type": "header_section"
-                })
+                }
                 
             except Exception as e:
                 logging.error(f"Error extracting header section: {e}")
-                all_sections.append({
+                yield {
                     "title": header_text,
                     "url": url,
                     "content": f"Error extracting content: {str(e)}",
                     "source_type": "extraction_failed"
-                })
-        
-        return all_sections
+                }
         
     except Exception as e:
         logging.error(f"Error in header-based section extraction: {e}")
-        return [{
+        yield {
             "title": "Header Extraction Failed",
             "url": url,
             "content": f"Failed to extract content by headers. Error: {str(e)}",
             "source_type": "extraction_failed"
-        }]
+        }
+
+def peek_extraction_failed(sections):
+    """Peek at the start of a section stream; return (failed, sections) with the peeked items put back."""
+    head = list(itertools.islice(sections, 2))
+    failed = not head or (len(head) == 1 and head[0].get("source_type") == "extraction_failed")
+    return failed, itertools.chain(head, sections)
 
-def extract_page_content(driver, url):
-    """Extract content from a page, trying different strategies."""
+def extract_page_content(driver, url, after_load=None):
+    """Extract content from a page, trying different strategies. Yields sections as they are extracted.
+
+    after_load(driver), if given, runs once the page has loaded and overlays are handled,
+    for site-specific setup such as selecting a code language tab."""
     try:
         logging.info(f"Extracting content from: {url}")
         driver.get(url)
@@ -774,61 +832,70 @@ def extract_page_content(driver, url):
             )
         except TimeoutException:
             logging.warning(f"Page load timed out for: {url}")
-            return {
+            yield {
                 "title": "Page Load Timeout",
                 "url": url,
                 "content": "The page took too long to load.",
                 "source_type": "timeout"
             }
+            return
         
         # Handle any overlays or popups
         handle_overlays(driver)
         
+        if after_load:
+            after_load(driver)
+        
         # Try to get page title
         page_title = driver.title
         
         # First try to extract structured sections based on navigation
-        sections = extract_sections_from_page(driver, url)
+        failed, sections = peek_extraction_failed(extract_sections_from_page(driver, url))
         
         # If no sections were found or extraction failed, try header-based approach
-        if not sections or (len(sections) == 1 and sections[0].get("source_type") == "extraction_failed"):
+        if failed:
             logging.info("Navigation-based extraction failed. Trying header-based extraction.")
-            sections = extract_sections_with_headers(driver, url)
+            failed, sections = peek_extraction_failed(extract_sections_with_headers(driver, url))
         
         # If still no success, get the whole page as a single section
-        if not sections or (len(sections) == 1 and sections[0].get("source_type") == "extraction_failed"):
+        if failed:
             logging.info("Header-based extraction failed. Falling back to full-page extraction.")
-            full_page_sections = []
-            extract_full_page_content(driver, url, full_page_sections)
-            sections = full_page_sections
+            sections = extract_full_page_sections(driver, url)
         
-        # If we have multiple sections, return them all
-        if len(sections) > 0:
-            logging.info(f"Successfully extracted {len(sections)} sections from {url}")
-            return sections
+        section_count = 0
+        for section in sections:
+            section_count += 1
+            yield section
+        
+        # If we have sections, they have all been passed on
+        if section_count > 0:
+            logging.info(f"Successfully extracted {section_count} sections from {url}")
+            return
         
         # Last resort fallback
         logging.warning(f"All extraction methods failed for {url}. Using minimal fallback.")
-        return [{
+        yield {
             "title": page_title or "Unknown Page",
             "url": url,
             "content": "Failed to extract meaningful content after trying multiple strategies.",
             "source_type": "extraction_failed"
-        }]
+        }
             
     except Exception as e:
         logging.error(f"Error extracting page content: {e}")
-        return [{
+        yield {
             "title": "Extraction Error",
             "url": url,
             "content": f"An error occurred during content extraction: {str(e)}",
             "source_type": "extraction_failed"
-        }]
+        }
 
 # --- Main Scraping Function ---
 def main(args):
     """Main function to run the scraper."""
-    setup_logging(args.log_level)
+    # Callers running several scrapes at once configure logging once themselves
+    if getattr(args, 'configure_logging', True):
+        setup_logging(args.log_level)
     
     md_filename_to_upload = None
     json_filename_to_save = None
@@ -865,26 +932,29 @@ def main(args):
             
             # For a single-page documentation site, we'll just extract from the start URL
             logging.info(f"Processing single-page documentation: {args.start_url}")
-            sections = extract_page_content(driver, args.start_url)
+            # Callers may inject a site-specific extractor instead of patching this module
+            extract_hook = getattr(args, 'extract_hook', None) or extract_page_content
+            sections = extract_hook(driver, args.start_url)
             
-            if sections:
-                # Add all sections to the scraped content
-                all_scraped_content.extend(sections)
-                logging.info(f"Successfully extracted {len(sections)} sections from the documentation page")
+            # Prepare filenames for saving the content; callers may fix the Markdown name up front
+            output_filename = getattr(args, 'output_filename', None)
+            if output_filename:
+                md_filename_to_upload = os.path.join(args.output_dir, output_filename)
+                json_filename_to_save = os.path.splitext(md_filename_to_upload)[0] + ".json"
             else:
-                logging.warning("No sections were extracted from the documentation page")
-            
-            # Prepare filenames for saving the content
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            json_filename_to_save = os.path.join(args.output_dir, f"website_documentation_{timestamp}.json")
-            md_filename_to_upload = os.path.join(args.output_dir, f"website_documentation_{timestamp}.md")
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                json_filename_to_save = os.path.join(args.output_dir, f"website_documentation_{timestamp}.json")
+                md_filename_to_upload = os.path.join(args.output_dir, f"website_documentation_{timestamp}.md")
             
             # Ensure output directory exists
             os.makedirs(args.output_dir, exist_ok=True)
             
-            # Save the scraped content
-            save_as_json(all_scraped_content, json_filename_to_save)
-            save_as_markdown(all_scraped_content, md_filename_to_upload, len(sections))
+            # Save the scraped content while it is being extracted; only a per-section summary is kept
+            all_scraped_content = save_sections(sections, json_filename_to_save, md_filename_to_upload)
+            if all_scraped_content:
+                logging.info(f"Successfully extracted {len(all_scraped_content)} sections from the documentation page")
+            else:
+                logging.warning("No sections were extracted from the documentation page")
             
         # Google Drive Upload (if configured)
         if md_filename_to_upload and os.path.exists(md_filename_to_upload) and args.target_folder_id:
@@ -892,7 +962,8 @@ def main(args):
             if drive_service:
                 logging.info(f"Proceeding with Google Drive operations for: {md_filename_to_upload}")
                 if args.archive_folder_id:
-                    find_and_archive_existing_files(drive_service, args.target_folder_id, args.archive_folder_id)
+                    archive_prefix = getattr(args, 'archive_filename_prefix', None) or "website_documentation_"
+                    find_and_archive_existing_files(drive_service, args.target_folder_id, args.archive_folder_id, archive_prefix)
                 else:
                     logging.info("Archive folder ID not provided, skipping archiving.")
                 upload_file_to_drive(drive_service, md_filename_to_upload, args.target_folder_id)
@@ -913,6 +984,8 @@ def main(args):
         
     finally:
         if driver:
+            with _active_drivers_lock:
+                active_drivers.discard(driver)
             try:
                 driver.quit()
                 logging.info("Browser closed.")